@@ -2,11 +2,17 @@
 # Exit on error
 set -o errexit
 
+# One-off commands below do not serve requests: no timetable hot reload
+export TIMETABLE_WATCH=False
+
 # Install dependencies
 pip install -r requirements.txt
 
 # Collect static files
 python manage.py collectstatic --no-input
 
-# Apply migrations
+# Apply migrations (camera counts live in their own database)
 python manage.py migrate
+python manage.py migrate --database=camera
+# Move rooms, cameras and counts created before the split (no-op afterwards)
+python manage.py copy_camera_data
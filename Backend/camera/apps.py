@@ -0,0 +1,13 @@
+"""
+Camera app initialization
+"""
+from django.apps import AppConfig
+
+
+class CameraConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'camera'
+
+    def ready(self):
+        # Signal handlers that keep each room's latest count current on deletes
+        from . import signals  # noqa: F401
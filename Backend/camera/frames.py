@@ -0,0 +1,115 @@
+"""
+Latest-frame ring buffer between a camera's capture and inference stages
+
+The capture thread decodes every frame the stream delivers so the decoder
+never falls behind, but inference only ever wants the newest one. Frames are
+decoded straight into a few preallocated buffers: the consumer checks out
+the newest frame, the producer overwrites the oldest buffer nobody holds,
+and a frame overwritten before it was consumed is counted as dropped.
+Memory per camera is `capacity` frames, whatever the stream does.
+"""
+import threading
+
+# One buffer being inferred, one holding the newest frame, one being written
+MIN_CAPACITY = 3
+
+
+class FrameRing:
+    """
+    Fixed-size ring of reusable frame buffers keeping only the freshest frames
+
+    Producer: slot = ring.writable_slot(); decode into ring.buffer(slot);
+    ring.commit(slot). Consumer: ring.acquire() returns (sequence, buffer)
+    of the newest unseen frame; call ring.release() when done with it.
+    """
+    def __init__(self, capacity=MIN_CAPACITY):
+        if capacity < MIN_CAPACITY:
+            raise ValueError(f"FrameRing needs at least {MIN_CAPACITY} buffers")
+        self.capacity = capacity
+        self._buffers = [None] * capacity
+        self._sequences = [0] * capacity
+        self._latest = None
+        self._in_use = None
+        self._last_sequence = 0
+        self._consumed_sequence = 0
+        self._closed = False
+        self._ready = threading.Condition()
+        self.captured = 0
+        self.dropped = 0
+
+    def allocate(self, make_buffer):
+        """
+        (Re)allocate every buffer with `make_buffer()`, e.g. for a new frame size
+        A pending frame is discarded; one the consumer holds stays valid.
+        """
+        with self._ready:
+            self._buffers = [make_buffer() for _ in range(self.capacity)]
+            self._sequences = [0] * self.capacity
+            self._latest = None
+
+    @property
+    def allocated(self):
+        return self._buffers[0] is not None
+
+    def buffer(self, slot):
+        return self._buffers[slot]
+
+    def writable_slot(self):
+        """The buffer holding the oldest frame that is neither newest nor checked out"""
+        with self._ready:
+            return min(
+                (slot for slot in range(self.capacity) if slot not in (self._latest, self._in_use)),
+                key=self._sequences.__getitem__
+            )
+
+    def commit(self, slot):
+        """Publish the frame just written into `slot` as the newest"""
+        with self._ready:
+            latest = self._latest
+            if latest is not None and self._sequences[latest] > self._consumed_sequence:
+                # Replaced before inference ever saw it
+                self.dropped += 1
+            self._last_sequence += 1
+            self._sequences[slot] = self._last_sequence
+            self._latest = slot
+            self.captured += 1
+            self._ready.notify_all()
+
+    def acquire(self, timeout=None):
+        """
+        Check out the newest frame not seen yet, waiting up to `timeout`
+        Returns (sequence, buffer), or None on timeout or once closed.
+        """
+        with self._ready:
+            if self._in_use is not None:
+                raise RuntimeError("Release the previous frame before acquiring another")
+            fresh = self._ready.wait_for(
+                lambda: self._closed or (
+                    self._latest is not None
+                    and self._sequences[self._latest] > self._consumed_sequence
+                ),
+                timeout
+            )
+            if not fresh or self._closed:
+                return None
+            slot = self._latest
+            self._in_use = slot
+            self._consumed_sequence = self._sequences[slot]
+            return self._consumed_sequence, self._buffers[slot]
+
+    def release(self):
+        """Hand the checked-out buffer back to the producer"""
+        with self._ready:
+            self._in_use = None
+
+    def close(self):
+        """Wake and stop the consumer"""
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+
+    def reopen(self):
+        """Accept a consumer again after close(), e.g. when processing restarts"""
+        with self._ready:
+            self._closed = False
+            self._in_use = None
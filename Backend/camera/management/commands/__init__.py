@@ -0,0 +1 @@
+# This file makes Python treat the directory as containing packages
@@ -0,0 +1,125 @@
+"""
+Django management command to copy camera data into the camera database
+Usage: python manage.py copy_camera_data [--source DATABASE] [--batch-size N]
+
+Rooms, cameras and counts used to live in the default database; the
+CameraRouter now reads and writes them in the 'camera' database. Run this
+once after `migrate --database=camera` so existing rows move with them:
+rows are copied with their primary keys and timestamps, one batched
+INSERT (executemany) per --batch-size rows, all in one transaction.
+It does nothing when the source has no camera tables or the camera database
+already holds data, so it is safe to run on every deploy. The old tables in
+the source database are left in place and can be dropped afterwards.
+"""
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from camera.models import Camera, CameraCount, Room
+
+# Referenced models first
+MODELS = (Room, Camera, CameraCount)
+
+
+class Command(BaseCommand):
+    help = 'Copy rooms, cameras and counts from the default database into the camera database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            type=str,
+            help='Database alias holding the existing camera tables',
+            default='default'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Number of rows per INSERT',
+            default=1000
+        )
+
+    def handle(self, *args, **options):
+        source = options.get('source')
+        target = router.db_for_write(Room)
+        batch_size = options.get('batch_size')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if source not in connections:
+            raise CommandError(f'Unknown database: {source}')
+        if source == target:
+            raise CommandError('Camera data already lives in the source database')
+
+        tables = set(connections[source].introspection.table_names())
+        models = [model for model in MODELS if model._meta.db_table in tables]
+        if not models:
+            self.stdout.write(f'No camera tables in {source}, nothing to copy')
+            return
+        if any(model.objects.using(target).exists() for model in MODELS):
+            self.stdout.write(self.style.WARNING(f'Camera database {target} already holds data, skipping'))
+            return
+
+        try:
+            with transaction.atomic(using=target):
+                copied = {model: self._copy(model, source, target, batch_size) for model in models}
+                connection = connections[target]
+                with connection.cursor() as cursor:
+                    for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                        cursor.execute(sql)
+                # Older tables predate the denormalized latest count
+                for room_id in Room.objects.using(target).values_list('pk', flat=True):
+                    Room.refresh_latest_count(room_id, using=target)
+        except Exception as e:
+            raise CommandError(f'Error copying camera data, nothing was copied: {str(e)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Copied {copied.get(Room, 0)} rooms, {copied.get(Camera, 0)} cameras and '
+            f'{copied.get(CameraCount, 0)} counts from {source} to {target}'
+        ))
+
+    def _copy(self, model, source, target, batch_size):
+        """
+        Copy every row of `model` in batches
+        Columns the source table predates get the field's default.
+        """
+        connection = connections[source]
+        with connection.cursor() as cursor:
+            columns = {
+                column.name for column in
+                connection.introspection.get_table_description(cursor, model._meta.db_table)
+            }
+        fields = model._meta.concrete_fields
+        present = [field for field in fields if field.column in columns]
+
+        # A plain INSERT: bulk_create() would stamp auto_now/auto_now_add
+        # fields with the current time instead of keeping the source values
+        connection = connections[target]
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+
+        queryset = model.objects.using(source).order_by('pk')
+        total = queryset.count()
+        rows = queryset.values(*[field.attname for field in present]).iterator(chunk_size=batch_size)
+        name = model._meta.verbose_name_plural
+        copied = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [
+                    [
+                        field.get_db_prep_save(
+                            row[field.attname] if field.attname in row else field.get_default(), connection
+                        )
+                        for field in fields
+                    ]
+                    for row in batch
+                ])
+            copied += len(batch)
+            self.stdout.write(f'  {name}: {copied}/{total}')
+        return copied
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-17 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cameracount',
+            index=models.Index(fields=['timestamp', 'id'], name='camera_count_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-17 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0002_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='latest_count',
+            field=models.IntegerField(default=0, help_text='People count of the newest count'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='latest_count_at',
+            field=models.DateTimeField(blank=True, help_text='Timestamp of the newest count', null=True),
+        ),
+    ]
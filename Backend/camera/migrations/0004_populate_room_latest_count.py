@@ -0,0 +1,29 @@
+# Generated by Django 4.2.8 on 2026-10-17 10:28
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_latest_count(apps, schema_editor):
+    """Fill latest_count/latest_count_at for rooms counted before the columns existed"""
+    Room = apps.get_model('camera', 'Room')
+    CameraCount = apps.get_model('camera', 'CameraCount')
+    db_alias = schema_editor.connection.alias
+    latest = CameraCount.objects.using(db_alias).filter(
+        room_id=OuterRef('pk')
+    ).order_by('-timestamp', '-id')
+    Room.objects.using(db_alias).filter(counts__isnull=False).update(
+        latest_count=Subquery(latest.values('people_count')[:1]),
+        latest_count_at=Subquery(latest.values('timestamp')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera', '0003_room_latest_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_latest_count, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 """
 Camera app models
 """
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Q
 from django.utils import timezone
 
 
@@ -25,6 +26,11 @@ class Room(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     last_updated = models.DateTimeField(null=True, blank=True, help_text="Last time counts were updated")
     
+    # Denormalized from the newest CameraCount, kept up to date by CameraCount.save()
+    # and camera.signals; ordinary saves leave these columns alone (COUNT_FIELDS)
+    latest_count = models.IntegerField(default=0, help_text="People count of the newest count")
+    latest_count_at = models.DateTimeField(null=True, blank=True, help_text="Timestamp of the newest count")
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -32,18 +38,53 @@ class Room(models.Model):
             models.Index(fields=['-created_at']),
         ]
     
+    # Columns only count writes maintain
+    COUNT_FIELDS = ('latest_count', 'latest_count_at', 'last_updated')
+    
     def __str__(self):
         return f"{self.name} ({self.camera_ip})"
     
+    def save(self, *args, **kwargs):
+        """
+        Save the room without touching its count columns unless listed
+        A room loaded before a count arrived would otherwise write its stale
+        latest count back over the newer one.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNT_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     def get_latest_count(self):
         """Get the most recent people count for this room"""
-        latest = self.counts.first()
-        return latest.people_count if latest else 0
+        return self.latest_count
     
     def get_latest_count_timestamp(self):
         """Get the timestamp of the most recent count"""
-        latest = self.counts.first()
-        return latest.timestamp if latest else None
+        return self.latest_count_at
+    
+    @classmethod
+    def record_count(cls, room_id, people_count, timestamp, using=None):
+        """
+        Store a count as the room's latest unless a newer one is already there
+        One conditional UPDATE, so concurrent writers cannot go backwards.
+        """
+        return cls.objects.using(using).filter(pk=room_id).filter(
+            Q(latest_count_at__isnull=True) | Q(latest_count_at__lte=timestamp)
+        ).update(latest_count=people_count, latest_count_at=timestamp, last_updated=timestamp)
+    
+    @classmethod
+    def refresh_latest_count(cls, room_id, using=None):
+        """Recompute the latest count of a room from its counts"""
+        latest = CameraCount.objects.using(using).filter(room_id=room_id).order_by(
+            '-timestamp', '-id'
+        ).values('people_count', 'timestamp').first()
+        return cls.objects.using(using).filter(pk=room_id).update(
+            latest_count=latest['people_count'] if latest else 0,
+            latest_count_at=latest['timestamp'] if latest else None,
+        )
 
 
 class Camera(models.Model):
@@ -116,8 +157,17 @@ class CameraCount(models.Model):
         indexes = [
             models.Index(fields=['camera', '-timestamp']),
             models.Index(fields=['room', '-timestamp']),
+            # Keyset pagination key of the counts list
+            models.Index(fields=['timestamp', 'id'], name='camera_count_timestamp_idx'),
         ]
     
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(CameraCount, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if self.room_id:
+                Room.record_count(self.room_id, self.people_count, self.timestamp, using=using)
+    
     def __str__(self):
         if self.room:
             return f"{self.room.name} - {self.people_count} people at {self.timestamp}"
@@ -2,6 +2,7 @@
 Camera app serializers
 """
 from rest_framework import serializers
+from core.serializers import SharedNestedListSerializer
 from .models import Camera, CameraCount, Room
 
 
@@ -26,6 +27,23 @@ class CameraSerializer(serializers.ModelSerializer):
         return obj.get_rtsp_url()
 
 
+class RoomSerializer(serializers.ModelSerializer):
+    """
+    Main serializer for Room model
+    The count columns are kept up to date by count writes, never by the API.
+    """
+    latest_count_timestamp = serializers.DateTimeField(source='latest_count_at', read_only=True)
+    
+    class Meta:
+        model = Room
+        fields = [
+            'id', 'name', 'camera_ip', 'is_active', 'status',
+            'created_at', 'updated_at', 'last_updated',
+            'latest_count', 'latest_count_timestamp'
+        ]
+        read_only_fields = ['created_at', 'updated_at', 'last_updated', 'latest_count']
+
+
 class CameraCountSerializer(serializers.ModelSerializer):
     """
     Serializer for camera counts (basic)
@@ -41,14 +59,18 @@ class CameraCountSerializer(serializers.ModelSerializer):
             'timestamp'
         ]
         read_only_fields = ['timestamp']
+        # ?expand= nests these instead of returning their ids
+        expandable_fields = {'camera': CameraSerializer, 'room': RoomSerializer}
 
 
 class CameraCountDetailSerializer(serializers.ModelSerializer):
     """
     Detailed serializer for camera counts with nested objects
+    Lists serialize each distinct camera and room once; query with
+    core.serializers.optimize_queryset to join them in.
     """
     camera = CameraSerializer(read_only=True)
-    room = serializers.SerializerMethodField()
+    room = RoomSerializer(read_only=True)
     
     class Meta:
         model = CameraCount
@@ -57,12 +79,7 @@ class CameraCountDetailSerializer(serializers.ModelSerializer):
             'frames_processed', 'inference_time_ms', 'timestamp'
         ]
         read_only_fields = ['timestamp']
-    
-    def get_room(self, obj):
-        """Get room serialized data"""
-        if obj.room:
-            return RoomSerializer(obj.room).data
-        return None
+        list_serializer_class = SharedNestedListSerializer
 
 
 class CameraConnectSerializer(serializers.Serializer):
@@ -76,31 +93,6 @@ class CameraConnectSerializer(serializers.Serializer):
     rtsp_path = serializers.CharField(required=False, allow_blank=True)
 
 
-class RoomSerializer(serializers.ModelSerializer):
-    """
-    Main serializer for Room model
-    """
-    latest_count = serializers.SerializerMethodField()
-    latest_count_timestamp = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Room
-        fields = [
-            'id', 'name', 'camera_ip', 'is_active', 'status',
-            'created_at', 'updated_at', 'last_updated',
-            'latest_count', 'latest_count_timestamp'
-        ]
-        read_only_fields = ['created_at', 'updated_at']
-    
-    def get_latest_count(self, obj):
-        """Get the latest people count for the room"""
-        return obj.get_latest_count()
-    
-    def get_latest_count_timestamp(self, obj):
-        """Get the timestamp of the latest count"""
-        return obj.get_latest_count_timestamp()
-
-
 class RoomCountSerializer(serializers.ModelSerializer):
     """
     Serializer for room counts (recent counts for a room)
@@ -0,0 +1,26 @@
+"""
+Keep Room.latest_count current when counts are deleted
+
+CameraCount.save() records new counts itself, but queryset deletes and
+cascades (deleting a Camera or a Room) never call CameraCount.delete(), so
+the recompute hangs off post_delete instead, once per room on commit.
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from core.transactions import OnCommitBatch
+from .models import CameraCount, Room
+
+
+def _refresh_rooms(using, rooms=()):
+    for room_id in rooms:
+        Room.refresh_latest_count(room_id, using=using)
+
+
+_refreshes = OnCommitBatch(_refresh_rooms)
+
+
+@receiver(post_delete, sender=CameraCount)
+def _count_deleted(sender, instance, using, **kwargs):
+    if instance.room_id:
+        _refreshes.mark(using, rooms={instance.room_id})
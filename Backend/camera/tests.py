@@ -0,0 +1,444 @@
+"""
+Camera tests
+"""
+import base64
+import concurrent.futures
+import io
+import json
+import threading
+import time
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connections, router
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from core.pagination import KeysetPagination
+from core.serializers import get_values_plan, optimize_queryset
+from .frames import FrameRing
+from .models import Camera, CameraCount, Room
+from . import yolo_service
+from .yolo_service import CameraProcessor, InferenceScheduler
+from .serializers import (
+    CameraSerializer, CameraCountSerializer, CameraCountDetailSerializer, RoomSerializer
+)
+
+
+class CameraCountAPITests(TestCase):
+    """Test camera count endpoints"""
+    databases = {'default', 'camera'}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.camera = Camera.objects.create(name='Lab Camera', ip_address='192.168.1.50')
+
+    def test_counts_keyset_pages(self):
+        """Test count pages walk (timestamp, id) newest first, ties included"""
+        counts = CameraCount.objects.bulk_create(
+            [CameraCount(camera=self.camera, people_count=i) for i in range(7)]
+        )
+        # Two counts share a timestamp, the key's id column keeps them apart
+        now = timezone.now()
+        for i, count in enumerate(counts):
+            count.timestamp = now - timezone.timedelta(minutes=i // 2)
+        CameraCount.objects.bulk_update(counts, ['timestamp'])
+        expected = list(
+            CameraCount.objects.order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+
+        seen = []
+        url = '/api/v1/camera-counts/'
+        with mock.patch.object(KeysetPagination, 'page_size', 3):
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('count', response.data)
+                seen.extend(count['id'] for count in response.data['results'])
+                url = response.data['next']
+        self.assertEqual(seen, expected)
+
+    def test_tampered_cursor_is_not_found(self):
+        """Test cursor values that do not fit the key fields return 404"""
+        CameraCount.objects.create(camera=self.camera, people_count=1)
+        for values in (['notadate', 1], [{'a': 1}, 1], [None, 'x'], ['2026-01-01T00:00:00Z', 'abc'], ['2026-01-01', 10**30]):
+            cursor = base64.urlsafe_b64encode(json.dumps({'v': values, 'r': 0}).encode()).decode()
+            response = self.client.get('/api/v1/camera-counts/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, values)
+        # A well-formed cursor past the last row is an empty page, not an error
+        cursor = base64.urlsafe_b64encode(json.dumps({'v': ['2000-01-01T00:00:00+00:00', 1], 'r': 0}).encode()).decode()
+        response = self.client.get('/api/v1/camera-counts/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+        self.assertIsNotNone(response.data['previous'])
+
+    def test_values_serialization_is_byte_identical(self):
+        """Test the .values() fast path renders exactly what the serializer does"""
+        room = Room.objects.create(name='Main Hall', camera_ip='10.0.0.9')
+        CameraCount.objects.create(camera=self.camera, people_count=4, inference_time_ms=12.5)
+        CameraCount.objects.create(room=room, people_count=7, frames_processed=60)
+        CameraCount.objects.create(people_count=0)
+        queryset = CameraCount.objects.order_by('id')
+
+        plan = get_values_plan(CameraCountSerializer)
+        fast = JSONRenderer().render(plan.to_representation(plan.values(queryset)))
+        slow = JSONRenderer().render(CameraCountSerializer(queryset, many=True).data)
+        self.assertEqual(fast, slow)
+        # Nested serializers need model instances
+        self.assertIsNone(get_values_plan(CameraCountDetailSerializer))
+
+
+    def test_camera_counts_query_count(self):
+        """Test a camera's count history joins its camera and rooms in one query"""
+        rooms = [Room.objects.create(name=f'Room {i}', camera_ip=f'10.0.2.{i}') for i in range(2)]
+        for i in range(6):
+            CameraCount.objects.create(camera=self.camera, room=rooms[i % 2], people_count=i)
+        CameraCount.objects.create(camera=self.camera, people_count=9)
+        # The camera lookup plus one SELECT for every count
+        with self.assertNumQueries(2, using='camera'):
+            response = self.client.get(f'/api/v1/cameras/{self.camera.pk}/counts/?limit=1000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 7)
+        self.assertIsNone(response.data[0]['room'])
+        self.assertEqual(response.data[1]['room'], RoomSerializer(Room.objects.get(pk=rooms[1].pk)).data)
+        self.assertEqual(response.data[1]['camera'], CameraSerializer(self.camera).data)
+
+        # Each distinct room is serialized once and shared by its rows
+        counts = optimize_queryset(
+            CameraCount.objects.filter(room__isnull=False), CameraCountDetailSerializer
+        )
+        data = CameraCountDetailSerializer(counts, many=True).data
+        self.assertIs(data[0]['room'], data[2]['room'])
+        self.assertIs(data[0]['camera'], data[1]['camera'])
+
+    def test_count_detail_single_query(self):
+        """Test retrieving a count joins the camera and room it names"""
+        room = Room.objects.create(name='Main Hall', camera_ip='10.0.0.9')
+        count = CameraCount.objects.create(camera=self.camera, room=room, people_count=3)
+        with self.assertNumQueries(1, using='camera'):
+            response = self.client.get(f'/api/v1/camera-counts/{count.pk}/')
+        self.assertEqual(response.data['camera_name'], 'Lab Camera')
+        self.assertEqual(response.data['room_name'], 'Main Hall')
+
+
+    def test_counts_expand_and_fields(self):
+        """Test ?expand= nests cameras and rooms without a query per row"""
+        room = Room.objects.create(name='Main Hall', camera_ip='10.0.0.9')
+        for i in range(4):
+            CameraCount.objects.create(
+                camera=self.camera, room=room if i % 2 else None, people_count=i
+            )
+        with self.assertNumQueries(1, using='camera'):
+            response = self.client.get(
+                '/api/v1/camera-counts/?fields=people_count&expand=camera,room'
+            )
+        results = response.data['results']
+        self.assertEqual(list(results[0]), ['camera', 'room', 'people_count'])
+        self.assertEqual(results[0]['camera'], CameraSerializer(self.camera).data)
+        self.assertEqual(results[0]['room']['name'], 'Main Hall')
+        self.assertIsNone(results[1]['room'])
+
+        response = self.client.get(f'/api/v1/cameras/{self.camera.pk}/?fields=name,rtsp_url')
+        self.assertEqual(response.data, {
+            'name': 'Lab Camera', 'rtsp_url': 'rtsp://192.168.1.50:554'
+        })
+
+
+class RoomAPITests(TestCase):
+    """Test room endpoints"""
+    databases = {'default', 'camera'}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.room = Room.objects.create(name='Main Hall', camera_ip='10.0.0.9')
+
+    def test_latest_count_follows_counts(self):
+        """Test writing and deleting counts keeps the room's latest count current"""
+        self.assertEqual(self.room.get_latest_count(), 0)
+        CameraCount.objects.create(room=self.room, people_count=5)
+        newest = CameraCount.objects.create(room=self.room, people_count=9)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.latest_count, 9)
+        self.assertEqual(self.room.latest_count_at, newest.timestamp)
+        self.assertEqual(self.room.last_updated, newest.timestamp)
+
+        # An older count arriving late does not replace the newer one
+        Room.record_count(self.room.pk, 1, newest.timestamp - timezone.timedelta(minutes=5))
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.latest_count, 9)
+
+        with self.captureOnCommitCallbacks(using='camera', execute=True):
+            newest.delete()
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.latest_count, 5)
+
+    def test_room_update_keeps_newer_count(self):
+        """Test saving a room loaded before a count arrived does not roll the count back"""
+        stale = Room.objects.get(pk=self.room.pk)
+        count = CameraCount.objects.create(room=self.room, people_count=6)
+        stale.status = 'active'
+        stale.save()
+        response = self.client.patch(
+            f'/api/v1/rooms/{self.room.pk}/', {'name': 'Great Hall', 'last_updated': None}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.name, self.room.status), ('Great Hall', 'active'))
+        self.assertEqual((self.room.latest_count, self.room.latest_count_at), (6, count.timestamp))
+        self.assertEqual(self.room.last_updated, count.timestamp)
+
+    def test_cascade_delete_refreshes_latest_count(self):
+        """Test counts deleted by a cascade or a queryset delete update the room"""
+        camera = Camera.objects.create(name='Hall Camera', ip_address='10.0.0.2')
+        CameraCount.objects.create(room=self.room, people_count=3)
+        CameraCount.objects.create(room=self.room, camera=camera, people_count=8)
+        with self.captureOnCommitCallbacks(using='camera', execute=True):
+            camera.delete()
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.latest_count, 3)
+
+        with self.captureOnCommitCallbacks(using='camera', execute=True):
+            CameraCount.objects.filter(room=self.room).delete()
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.latest_count, self.room.latest_count_at), (0, None))
+
+    def test_rooms_list_queries(self):
+        """Test the rooms list reads latest counts without a query per room"""
+        for i in range(5):
+            room = Room.objects.create(name=f'Room {i}', camera_ip=f'10.0.1.{i}')
+            CameraCount.objects.create(room=room, people_count=i)
+        # One COUNT for the page plus one SELECT, however many rooms
+        with self.assertNumQueries(2, using='camera'):
+            response = self.client.get('/api/v1/rooms/')
+        self.assertEqual(response.status_code, 200)
+        counts = {room['name']: room['latest_count'] for room in response.data['results']}
+        self.assertEqual(counts['Room 3'], 3)
+        self.assertEqual(counts['Main Hall'], 0)
+
+
+class CameraDatabaseTests(TestCase):
+    """Test the camera database split and SQLite profile"""
+    databases = {'default', 'camera'}
+
+    def test_camera_models_use_camera_database(self):
+        """Test camera models are routed to and migrated on their own database"""
+        self.assertEqual(router.db_for_write(CameraCount), 'camera')
+        self.assertEqual(router.db_for_read(Camera), 'camera')
+        self.assertFalse(router.allow_migrate('default', 'camera'))
+        self.assertFalse(router.allow_migrate('camera', 'timetable'))
+        camera = Camera.objects.create(name='Hall Camera', ip_address='10.0.0.2')
+        self.assertEqual(camera._state.db, 'camera')
+
+    def test_copy_camera_data(self):
+        """Test rows created before the split are copied with their keys and timestamps"""
+        with connections['camera'].cursor() as cursor:
+            cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name IN "
+                "('camera_room', 'camera_camera', 'camera_cameracount')"
+            )
+            schema = [row[0] for row in cursor.fetchall()]
+        created = timezone.now() - timezone.timedelta(days=30)
+        with connections['default'].cursor() as cursor:
+            for sql in schema:
+                cursor.execute(sql)
+            # The old room table predates the denormalized latest count
+            cursor.execute('ALTER TABLE camera_room DROP COLUMN latest_count')
+            cursor.execute('ALTER TABLE camera_room DROP COLUMN latest_count_at')
+            cursor.execute(
+                'INSERT INTO camera_room (id, name, camera_ip, is_active, status, created_at, updated_at) '
+                'VALUES (7, %s, %s, 1, %s, %s, %s)',
+                ['Old Hall', '10.0.0.7', 'active', created, created]
+            )
+        camera = Camera(pk=3, name='Old Camera', ip_address='10.0.0.3', created_at=created, updated_at=created)
+        counts = [
+            CameraCount(pk=pk, room_id=7, camera_id=3, people_count=pk, timestamp=created + timezone.timedelta(minutes=pk))
+            for pk in range(8, 13)
+        ]
+        for obj in [camera] + counts:
+            obj.save_base(raw=True, force_insert=True, using='default')
+
+        out = io.StringIO()
+        call_command('copy_camera_data', batch_size=2, stdout=out)
+        self.assertIn('Camera Counts: 4/5', out.getvalue())
+        self.assertIn('Copied 1 rooms, 1 cameras and 5 counts', out.getvalue())
+        copied = CameraCount.objects.get(pk=12)
+        latest = created + timezone.timedelta(minutes=12)
+        self.assertEqual((copied.room_id, copied.camera_id, copied.timestamp), (7, 3, latest))
+        room = Room.objects.get(pk=7)
+        self.assertEqual((room.created_at, room.latest_count, room.latest_count_at), (created, 12, latest))
+        self.assertEqual(Room.objects.create(name='New Hall', camera_ip='10.0.0.8').pk, 8)
+
+        out = io.StringIO()
+        call_command('copy_camera_data', stdout=out)
+        self.assertIn('already holds data', out.getvalue())
+        self.assertEqual(CameraCount.objects.count(), 5)
+
+    def test_sqlite_pragmas_applied(self):
+        """Test new SQLite connections get the tuned profile"""
+        with connections['camera'].cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+
+class FrameRingTests(SimpleTestCase):
+    """Test the capture/inference frame ring"""
+
+    def setUp(self):
+        self.ring = FrameRing(3)
+        self.ring.allocate(lambda: bytearray(4))
+
+    def write(self, value):
+        slot = self.ring.writable_slot()
+        self.ring.buffer(slot)[:] = bytes([value]) * 4
+        self.ring.commit(slot)
+
+    def test_consumer_gets_freshest_frame(self):
+        """Test frames replaced before inference are dropped and counted"""
+        for value in range(1, 6):
+            self.write(value)
+        sequence, frame = self.ring.acquire(timeout=0)
+        self.assertEqual((sequence, frame[0]), (5, 5))
+        self.ring.release()
+        self.assertEqual(self.ring.captured, 5)
+        self.assertEqual(self.ring.dropped, 4)
+        # Nothing newer yet
+        self.assertIsNone(self.ring.acquire(timeout=0))
+
+    def test_checked_out_frame_is_never_overwritten(self):
+        """Test the producer keeps writing while inference holds a buffer"""
+        self.write(1)
+        _, frame = self.ring.acquire(timeout=0)
+        for value in range(2, 10):
+            self.write(value)
+        self.assertEqual(bytes(frame), bytes([1]) * 4)
+        self.ring.release()
+        _, frame = self.ring.acquire(timeout=0)
+        self.assertEqual(frame[0], 9)
+        self.ring.release()
+        self.assertEqual(self.ring.dropped, 7)
+
+    def test_close_wakes_consumer(self):
+        """Test closing the ring ends a waiting acquire"""
+        self.ring.close()
+        self.assertIsNone(self.ring.acquire(timeout=5))
+        self.ring.reopen()
+        self.write(1)
+        self.assertEqual(self.ring.acquire(timeout=0)[0], 1)
+        with self.assertRaises(ValueError):
+            FrameRing(2)
+
+    def test_processor_restart_consumes_frames(self):
+        """Test a stopped and restarted processor keeps running inference"""
+        processor = CameraProcessor(1, 'Hall', 'rtsp://camera', detector=lambda frame: frame[0], buffer_size=3)
+        processor.frames.allocate(lambda: bytearray(4))
+        self.ring = processor.frames
+        with mock.patch.object(yolo_service, 'cv2', object()), \
+                mock.patch.object(CameraProcessor, '_capture'), \
+                self.settings(CAMERA_PROCESSING_INTERVAL=3600, CAMERA_TIMEOUT=5):
+            for run in range(1, 3):
+                self.assertTrue(processor.start())
+                self.write(run)
+                deadline = time.monotonic() + 5
+                while processor.frames_processed < run and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                processor.stop()
+                self.assertEqual((processor.frames_processed, processor.last_count), (run, run))
+
+
+class InferenceSchedulerTests(SimpleTestCase):
+    """Test the shared batched inference scheduler"""
+
+    def setUp(self):
+        self.batches = []
+
+    def predict(self, frames):
+        self.batches.append(len(frames))
+        return [frame * 10 for frame in frames]
+
+    def test_frames_from_many_cameras_share_batches(self):
+        """Test concurrent frames are batched up to max_batch and routed back"""
+        scheduler = InferenceScheduler(self.predict, max_batch=4, max_wait=5)
+        self.addCleanup(scheduler.shutdown)
+        results = {}
+
+        def camera(frame):
+            results[frame] = scheduler.detect(frame)
+
+        threads = [threading.Thread(target=camera, args=(frame,)) for frame in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        self.assertEqual(results, {frame: frame * 10 for frame in range(8)})
+        self.assertEqual(self.batches, [4, 4])
+        self.assertEqual(scheduler.stats()['avg_batch_size'], 4)
+
+    def test_partial_batch_runs_after_max_wait(self):
+        """Test a lone frame is not held longer than max_wait"""
+        scheduler = InferenceScheduler(self.predict, max_batch=8, max_wait=0.01)
+        self.addCleanup(scheduler.shutdown)
+        self.assertEqual(scheduler.detect(3), 30)
+        self.assertEqual(self.batches, [1])
+
+    def test_failed_batch_reaches_every_caller(self):
+        """Test a model error is raised to each camera in the batch"""
+        def fail(frames):
+            raise RuntimeError('model failed')
+        scheduler = InferenceScheduler(fail, max_batch=2, max_wait=0.01)
+        self.addCleanup(scheduler.shutdown)
+        with self.assertRaisesMessage(RuntimeError, 'model failed'):
+            scheduler.detect(1)
+        scheduler.shutdown()
+        with self.assertRaises(RuntimeError):
+            scheduler.submit(2)
+
+    def test_short_result_fails_every_caller(self):
+        """Test a model returning too few counts fails the batch instead of hanging callers"""
+        scheduler = InferenceScheduler(lambda frames: [1], max_batch=2, max_wait=5, timeout=5)
+        self.addCleanup(scheduler.shutdown)
+        futures = [scheduler.submit(frame) for frame in (1, 2)]
+        for future in futures:
+            with self.assertRaisesMessage(RuntimeError, 'Model returned 1 results for 2 frames'):
+                future.result(timeout=5)
+
+    def test_detect_times_out_and_skips_the_frame(self):
+        """Test a caller stops waiting after the timeout and its frame is never run"""
+        gate = threading.Event()
+        seen = []
+
+        def slow(frames):
+            seen.extend(frames)
+            gate.wait(5)
+            return [0] * len(frames)
+        scheduler = InferenceScheduler(slow, max_batch=1, max_wait=0, timeout=0.05)
+        self.addCleanup(scheduler.shutdown)
+        first = scheduler.submit(1)
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            scheduler.detect(2)
+        gate.set()
+        self.assertEqual(first.result(timeout=5), 0)
+        scheduler.shutdown()
+        self.assertEqual(seen, [1])
+
+    def test_detect_waits_for_a_running_batch(self):
+        """Test a caller past its timeout keeps its frame until the model is done with it"""
+        started, gate = threading.Event(), threading.Event()
+
+        def slow(frames):
+            started.set()
+            gate.wait(5)
+            return [7] * len(frames)
+        scheduler = InferenceScheduler(slow, max_batch=1, max_wait=0, timeout=0.05)
+        self.addCleanup(scheduler.shutdown)
+        result = {}
+        caller = threading.Thread(target=lambda: result.update(count=scheduler.detect(1)))
+        caller.start()
+        self.assertTrue(started.wait(5))
+        caller.join(0.2)
+        self.assertTrue(caller.is_alive())
+        gate.set()
+        caller.join(5)
+        self.assertEqual(result, {'count': 7})
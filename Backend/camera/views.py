@@ -9,6 +9,8 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 import logging
 
+from core.pagination import KeysetPagination
+from core.serializers import SparseFieldsetMixin, ValuesListMixin, optimize_queryset
 from .models import Camera, CameraCount, Room
 from .serializers import (
     CameraSerializer, CameraCountSerializer,
@@ -20,7 +22,7 @@ from .yolo_service import start_camera_processing, stop_camera_processing
 logger = logging.getLogger(__name__)
 
 
-class CameraViewSet(viewsets.ModelViewSet):
+class CameraViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Camera ViewSet
     GET /api/v1/cameras/ - List all cameras
@@ -95,7 +97,7 @@ class CameraViewSet(viewsets.ModelViewSet):
         camera = self.get_object()
         
         try:
-            latest = camera.counts.first()
+            latest = optimize_queryset(camera.counts.all(), CameraCountSerializer).first()
             if latest:
                 serializer = CameraCountSerializer(latest)
                 return Response(serializer.data)
@@ -118,7 +120,9 @@ class CameraViewSet(viewsets.ModelViewSet):
         limit = request.query_params.get('limit', 100)
         
         try:
-            counts = camera.counts.all()[:int(limit)]
+            counts = optimize_queryset(
+                camera.counts.all(), CameraCountDetailSerializer
+            )[:int(limit)]
             serializer = CameraCountDetailSerializer(counts, many=True)
             return Response(serializer.data)
         except Exception as e:
@@ -129,15 +133,22 @@ class CameraViewSet(viewsets.ModelViewSet):
             )
 
 
-class CameraCountViewSet(viewsets.ReadOnlyModelViewSet):
+class CameraCountViewSet(SparseFieldsetMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     """
     CameraCount ViewSet (Read-only)
     GET /api/v1/camera-counts/ - List all counts
     GET /api/v1/camera-counts/?camera_id={id} - Filter by camera
     GET /api/v1/camera-counts/{id}/ - Retrieve specific count
+    
+    Keyset-paginated on (timestamp, id): follow the next/previous links,
+    deep pages cost the same as the first and the table is never counted.
+    Pages are serialized straight from .values() rows (ValuesListMixin);
+    single counts join what the serializer reads. ?fields= and
+    ?expand=camera,room pick and nest fields (SparseFieldsetMixin).
     """
-    queryset = CameraCount.objects.select_related('camera')
+    queryset = CameraCount.objects.all()
     serializer_class = CameraCountSerializer
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['camera']
     ordering_fields = ['timestamp', 'people_count']
@@ -241,7 +252,7 @@ class CameraConnectAPIView(APIView):
             )
 
 
-class RoomViewSet(viewsets.ModelViewSet):
+class RoomViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Room ViewSet for room-based camera management
     GET /api/rooms/ - List all rooms
@@ -284,7 +295,7 @@ class RoomViewSet(viewsets.ModelViewSet):
         limit = request.query_params.get('limit', 100)
         
         try:
-            counts = room.counts.all()[:int(limit)]
+            counts = optimize_queryset(room.counts.all(), RoomCountSerializer)[:int(limit)]
             serializer = RoomCountSerializer(counts, many=True)
             return Response(serializer.data)
         except Exception as e:
@@ -1,37 +1,231 @@
 """
 YOLO Camera Processing Service
 Handles camera connection, frame processing, and person counting
+
+Each camera runs two threads joined by a FrameRing: a capture thread that
+keeps draining the RTSP stream into preallocated frame buffers, and an
+inference thread that always takes the newest frame. A slow model then
+skips frames (counted in stats) instead of letting decoded frames pile up
+and the counts go stale.
+
+The inference threads do not run a model each: they hand their frame to
+one InferenceScheduler, which holds the single copy of settings.YOLO_MODEL
+and runs frames from every camera through it in batches.
 """
+import concurrent.futures
 import logging
 import threading
-from typing import Optional, Dict, Callable
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Dict, Callable, List
 from datetime import datetime
 
+from django.conf import settings
+from django.db import close_old_connections
+
+from .frames import FrameRing
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # Only needed to process live cameras
+    cv2 = np = None
+
 logger = logging.getLogger(__name__)
 
 # Global dictionary to track active camera processors
 _active_processors: Dict[int, 'CameraProcessor'] = {}
 
+# COCO class id of "person" in the stock YOLO models
+PERSON_CLASS = 0
+
+# Seconds between attempts to reopen a stream that failed
+RECONNECT_DELAY = 5.0
+
+
+def load_person_batch_detector() -> Callable:
+    """
+    Load settings.YOLO_MODEL and return detector(frames) -> people in each frame
+    """
+    from ultralytics import YOLO
+
+    model = YOLO(settings.YOLO_MODEL)
+
+    def detect(frames):
+        # A list source is one batched forward pass
+        results = model(list(frames), classes=[PERSON_CLASS], verbose=False)
+        return [len(result.boxes) for result in results]
+    return detect
+
+
+class InferenceScheduler:
+    """
+    Batches frames from every camera through one shared model
+    Callers block in detect(frame) while a worker thread gathers pending
+    frames into a batch: it runs as soon as `max_batch` frames are waiting,
+    or once the oldest has waited `max_wait` seconds, and each caller gets
+    the result for its own frame back. A frame still queued after `timeout`
+    seconds is dropped with an error; one already being inferred is waited for.
+    """
+    def __init__(self, predict_batch: Callable, max_batch: int, max_wait: float,
+                 timeout: Optional[float] = None):
+        self.predict_batch = predict_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._pending = deque()
+        self._ready = threading.Condition()
+        self._closed = False
+        
+        # Stats
+        self.batches = 0
+        self.frames = 0
+        self.inference_time_ms = 0.0
+        
+        self._thread = threading.Thread(target=self._run, name='yolo-inference', daemon=True)
+        self._thread.start()
+    
+    def submit(self, frame) -> Future:
+        """Queue a frame; the future resolves to its people count"""
+        future = Future()
+        with self._ready:
+            if self._closed:
+                raise RuntimeError("Inference scheduler is shut down")
+            self._pending.append((frame, future, time.monotonic()))
+            self._ready.notify()
+        return future
+    
+    def detect(self, frame) -> int:
+        """People count of `frame`, computed in the next batch"""
+        future = self.submit(frame)
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            # Still queued: the worker skips it instead of running a stale frame
+            if future.cancel():
+                raise
+        # Already in a running batch: the model may still be reading the
+        # frame, and the caller reuses its buffer as soon as we return
+        return future.result()
+    
+    def stats(self) -> dict:
+        """Batching efficiency of the shared model"""
+        return {
+            'batches': self.batches,
+            'frames': self.frames,
+            'pending': len(self._pending),
+            'avg_batch_size': self.frames / self.batches if self.batches else 0.0,
+            'avg_frame_time_ms': self.inference_time_ms / self.frames if self.frames else 0.0,
+        }
+    
+    def shutdown(self):
+        """Finish the queued frames and stop the worker"""
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+        self._thread.join()
+    
+    def _next_batch(self) -> Optional[List]:
+        with self._ready:
+            self._ready.wait_for(lambda: self._pending or self._closed)
+            if not self._pending:
+                return None
+            # The wait counts from the oldest frame, which may have queued
+            # up while the previous batch ran
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+            return [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                started = time.perf_counter()
+                counts = list(self.predict_batch([frame for frame, _, _ in batch]))
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if len(counts) != len(batch):
+                    raise RuntimeError(f"Model returned {len(counts)} results for {len(batch)} frames")
+            except Exception as e:
+                logger.error(f"Batched inference failed: {str(e)}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.frames += len(batch)
+            self.inference_time_ms += elapsed_ms
+            for (_, future, _), count in zip(batch, counts):
+                future.set_result(count)
+
+
+_scheduler: Optional[InferenceScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_inference_scheduler() -> InferenceScheduler:
+    """The process-wide scheduler, loading the YOLO model on first use"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = InferenceScheduler(
+                load_person_batch_detector(),
+                max_batch=settings.YOLO_MAX_BATCH,
+                max_wait=settings.YOLO_MAX_WAIT_MS / 1000,
+                timeout=settings.CAMERA_TIMEOUT,
+            )
+        return _scheduler
+
 
 class CameraProcessor:
     """
     Handles processing for a single camera
     """
-    def __init__(self, camera_id: int, camera_name: str, rtsp_url: str):
+    def __init__(self, camera_id: int, camera_name: str, rtsp_url: str,
+                 detector: Optional[Callable] = None, buffer_size: Optional[int] = None):
         self.camera_id = camera_id
         self.camera_name = camera_name
         self.rtsp_url = rtsp_url
         self.is_processing = False
         self.thread: Optional[threading.Thread] = None
+        self.capture_thread: Optional[threading.Thread] = None
+        self.detector = detector
+        self.frames = FrameRing(buffer_size or settings.CAMERA_FRAME_BUFFER_SIZE)
+        self._stop_event = threading.Event()
+        
+        # Stats
+        self.frames_processed = 0
+        self.inference_time_ms = 0.0
+        self.last_count: Optional[int] = None
+        self.last_count_at: Optional[datetime] = None
     
     def start(self):
         """Start processing for this camera"""
         if self.is_processing:
             logger.warning(f"Camera {self.camera_name} is already processing")
             return False
+        if cv2 is None:
+            logger.error(f"OpenCV and NumPy are required to process camera {self.camera_name}")
+            return False
         
         self.is_processing = True
-        self.thread = threading.Thread(target=self._process, daemon=True)
+        self._stop_event.clear()
+        self.frames.reopen()
+        self.capture_thread = threading.Thread(
+            target=self._capture, name=f'camera-{self.camera_id}-capture', daemon=True
+        )
+        self.thread = threading.Thread(
+            target=self._process, name=f'camera-{self.camera_id}-inference', daemon=True
+        )
+        self.capture_thread.start()
         self.thread.start()
         logger.info(f"Started processing for camera {self.camera_name}")
         return True
@@ -39,14 +233,122 @@ class CameraProcessor:
     def stop(self):
         """Stop processing for this camera"""
         self.is_processing = False
+        self._stop_event.set()
+        self.frames.close()
+        for thread in (self.capture_thread, self.thread):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=settings.CAMERA_TIMEOUT)
         logger.info(f"Stopped processing for camera {self.camera_name}")
         return True
     
+    def stats(self) -> dict:
+        """Throughput of this camera's pipeline"""
+        processed = self.frames_processed
+        return {
+            'camera_id': self.camera_id,
+            'is_processing': self.is_processing,
+            'frames_captured': self.frames.captured,
+            'frames_processed': processed,
+            'frames_dropped': self.frames.dropped,
+            'buffer_size': self.frames.capacity,
+            'avg_inference_time_ms': self.inference_time_ms / processed if processed else 0.0,
+            'last_count': self.last_count,
+            'last_count_at': self.last_count_at,
+        }
+    
+    def _open_stream(self):
+        capture = cv2.VideoCapture(self.rtsp_url)
+        # Keep the decoder's own queue short; the ring holds what we keep
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return capture
+    
+    def _capture(self):
+        """Capture loop: decode every frame into the ring, never waiting on inference"""
+        capture = None
+        try:
+            while not self._stop_event.is_set():
+                if capture is None or not capture.isOpened():
+                    capture = self._open_stream()
+                    if not capture.isOpened():
+                        logger.warning(f"Cannot open stream of camera {self.camera_name}")
+                        self._stop_event.wait(RECONNECT_DELAY)
+                        continue
+                
+                slot = self.frames.writable_slot()
+                ok, frame = capture.read(self.frames.buffer(slot))
+                if not ok:
+                    logger.warning(f"Lost stream of camera {self.camera_name}, reconnecting")
+                    capture.release()
+                    capture = None
+                    self._stop_event.wait(RECONNECT_DELAY)
+                    continue
+                if frame is not self.frames.buffer(slot):
+                    # First frame or a new resolution: size the buffers to it once
+                    self.frames.allocate(lambda: np.empty_like(frame))
+                    slot = self.frames.writable_slot()
+                    np.copyto(self.frames.buffer(slot), frame)
+                self.frames.commit(slot)
+        except Exception as e:
+            logger.error(f"Capture failed for camera {self.camera_name}: {str(e)}")
+        finally:
+            if capture is not None:
+                capture.release()
+    
     def _process(self):
-        """Main processing loop (stub for camera frame processing)"""
+        """Inference loop: count people on the freshest frame, save one count per interval"""
         logger.debug(f"Processing loop started for {self.camera_name}")
-        # This would contain actual YOLO inference code
-        # For now, it's a placeholder
+        try:
+            if self.detector is None:
+                self.detector = get_inference_scheduler().detect
+        except Exception as e:
+            logger.error(f"Cannot load YOLO model for camera {self.camera_name}: {str(e)}")
+            self.is_processing = False
+            self._stop_event.set()
+            return
+        
+        window_counts, window_time_ms = [], 0.0
+        window_start = time.monotonic()
+        while not self._stop_event.is_set():
+            item = self.frames.acquire(timeout=1.0)
+            if item is not None:
+                _, frame = item
+                try:
+                    started = time.perf_counter()
+                    count = self.detector(frame)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                except Exception as e:
+                    logger.error(f"Inference failed for camera {self.camera_name}: {str(e)}")
+                    continue
+                finally:
+                    self.frames.release()
+                window_counts.append(count)
+                window_time_ms += elapsed_ms
+                self.frames_processed += 1
+                self.inference_time_ms += elapsed_ms
+                self.last_count = count
+            
+            if window_counts and time.monotonic() - window_start >= settings.CAMERA_PROCESSING_INTERVAL:
+                self._save_count(window_counts, window_time_ms)
+                window_counts, window_time_ms = [], 0.0
+                window_start = time.monotonic()
+    
+    def _save_count(self, counts, total_time_ms):
+        """Store one CameraCount for an interval's frames"""
+        from .models import CameraCount
+        
+        close_old_connections()
+        try:
+            record = CameraCount.objects.create(
+                camera_id=self.camera_id,
+                people_count=round(sum(counts) / len(counts)),
+                frames_processed=len(counts),
+                inference_time_ms=total_time_ms / len(counts),
+            )
+            self.last_count_at = record.timestamp
+        except Exception as e:
+            logger.error(f"Error saving count for camera {self.camera_name}: {str(e)}")
+        finally:
+            close_old_connections()
 
 
 def start_camera_processing(camera_id: int, camera_name: str, rtsp_url: str) -> bool:
@@ -67,8 +369,9 @@ def start_camera_processing(camera_id: int, camera_name: str, rtsp_url: str) ->
             return False
         
         processor = CameraProcessor(camera_id, camera_name, rtsp_url)
+        if not processor.start():
+            return False
         _active_processors[camera_id] = processor
-        processor.start()
         return True
     
     except Exception as e:
@@ -106,6 +409,16 @@ def get_active_processors() -> Dict[int, CameraProcessor]:
     return _active_processors.copy()
 
 
+def get_processing_stats() -> Dict[int, dict]:
+    """Pipeline stats of every active camera processor"""
+    return {camera_id: processor.stats() for camera_id, processor in _active_processors.items()}
+
+
+def get_inference_stats() -> Optional[dict]:
+    """Stats of the shared inference scheduler, None before it is started"""
+    return _scheduler.stats() if _scheduler is not None else None
+
+
 def is_camera_processing(camera_id: int) -> bool:
     """Check if a camera is currently processing"""
     return camera_id in _active_processors
@@ -3,6 +3,7 @@ Django settings for Nava Table API Backend.
 """
 
 import os
+import sys
 from pathlib import Path
 import environ
 
@@ -76,7 +77,25 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Camera counts are written continuously; their own file gives them their
+    # own SQLite writer lock (migrate it with: migrate --database=camera, then
+    # copy rows from before the split with: copy_camera_data)
+    'camera': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env('CAMERA_DATABASE_NAME', default=str(BASE_DIR / 'camera.sqlite3')),
+    },
+}
+DATABASE_ROUTERS = ['core.routers.CameraRouter']
+
+# PRAGMAs run on every new SQLite connection (see core.db)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',        # readers never block the writer, and vice versa
+    'synchronous': 'NORMAL',      # safe with WAL, fsync only at checkpoints
+    'busy_timeout': env.int('SQLITE_BUSY_TIMEOUT_MS', default=5000),
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -32 * 1024,     # negative means KiB: 32MB page cache
+    'temp_store': 'MEMORY',
 }
 
 # Password validation
@@ -173,10 +192,31 @@ if DEBUG:
     LOGGING['root']['handlers'].append('file')
     LOGGING['loggers']['django']['handlers'].append('file')
 
+# Timetable settings
+# Directory of per-term timetable files (see split_timetable); when it exists
+# terms are loaded lazily instead of from the single timetable.json
+TIMETABLE_TERMS_DIR = env('TIMETABLE_TERMS_DIR', default=str(BASE_DIR / 'timetable' / 'terms'))
+# Upper bound on source JSON kept parsed in memory across loaded terms
+TIMETABLE_TERM_CACHE_BYTES = env.int('TIMETABLE_TERM_CACHE_BYTES', default=32 * 1024 * 1024)
+# Seconds between background checks for changed timetable files (0 disables
+# the watcher; requests then check the file themselves)
+TIMETABLE_WATCH_INTERVAL = env.float('TIMETABLE_WATCH_INTERVAL', default=5.0)
+# Start that watcher in this process. On except under the test runner; set
+# TIMETABLE_WATCH=False for processes that do not serve requests (one-off
+# management commands, workers)
+TIMETABLE_WATCH = env.bool('TIMETABLE_WATCH', default=sys.argv[1:2] != ['test'])
+
 # Camera settings
 CAMERA_PROCESSING_INTERVAL = env.int('CAMERA_PROCESSING_INTERVAL', default=60)
 YOLO_MODEL = env('YOLO_MODEL', default='yolov8n.pt')
+# Frames from all cameras are batched through one model: a batch runs once
+# YOLO_MAX_BATCH frames wait or the oldest has waited YOLO_MAX_WAIT_MS
+YOLO_MAX_BATCH = env.int('YOLO_MAX_BATCH', default=8)
+YOLO_MAX_WAIT_MS = env.int('YOLO_MAX_WAIT_MS', default=25)
+# Seconds to wait for a camera's threads to stop or for a frame's inference
 CAMERA_TIMEOUT = env.int('CAMERA_TIMEOUT', default=30)
+# Decoded frames kept per camera between capture and inference (at least 3)
+CAMERA_FRAME_BUFFER_SIZE = env.int('CAMERA_FRAME_BUFFER_SIZE', default=3)
 
 # Celery Configuration (optional)
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://localhost:6379/0')
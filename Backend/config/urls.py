@@ -39,10 +39,19 @@ def api_root(request):
         'endpoints': {
             'timetable': {
                 'all_timetable': 'GET /api/v1/timetable/',
+                'all_timetable_stream': 'GET /api/v1/timetable/?stream=true',
+                'all_timetable_paged': 'GET /api/v1/timetable/?page_sections=5&cursor=',
                 'by_term': 'GET /api/v1/timetable/by-term/?term=Term_1_AY_2025/2026_Timetable',
                 'by_section': 'GET /api/v1/timetable/by-section/?term=Term_1_AY_2025/2026_Timetable&section=BAPM_2023_Section_A',
                 'student_timetable': 'GET /api/v1/timetable/student/?term=Term_1_AY_2025/2026_Timetable&section=BAPM_2023_Section_A',
                 'instructor_timetable': 'GET /api/v1/timetable/instructor/?instructor_name=Dieudonne, U.',
+                'free_rooms': 'GET /api/v1/timetable/free_rooms/?day=Tuesday&start=14:00&end=15:00',
+                'occupancy': 'GET /api/v1/timetable/occupancy/?classroom=Nyanza Classroom&day=Tuesday',
+                'conflicts': 'GET /api/v1/timetable/conflicts/?type=classroom',
+                'search': 'GET /api/v1/timetable/search/?q=dieudone&kind=instructor',
+                'now': 'GET /api/v1/timetable/now/?at=2026-01-13T10:45',
+                'next': 'GET /api/v1/timetable/next/?day=Tuesday&time=12:45',
+                'entries': 'GET /api/v1/timetable/entries/?instructor=&start_after=10:00&cursor=',
                 'cohorts': 'GET /api/v1/cohorts/',
                 'sections': 'GET /api/v1/sections/?cohort_id=',
                 'instructors': 'GET /api/v1/instructors/',
@@ -54,6 +63,7 @@ def api_root(request):
                 'detail': 'GET /api/v1/cameras/{id}/',
                 'latest_count': 'GET /api/v1/cameras/{id}/latest-count/',
                 'count_history': 'GET /api/v1/cameras/{id}/counts/',
+                'all_counts': 'GET /api/v1/camera-counts/?camera=&cursor=',
             },
             'rooms': {
                 'list': 'GET /api/v1/rooms/',
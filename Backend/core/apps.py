@@ -0,0 +1,15 @@
+"""
+Core app initialization
+"""
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        # Tune every SQLite connection (WAL, synchronous, mmap, cache, busy timeout)
+        from .db import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='core.configure_sqlite')
@@ -0,0 +1,16 @@
+"""
+SQLite connection profile
+"""
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Apply settings.SQLITE_PRAGMAS to a new SQLite connection
+    Connected to django.db.backends.signals.connection_created.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,102 @@
+"""
+Django management command to benchmark the .values() list serialization path
+Usage: python manage.py benchmark_serialization [--rows N] [--repeat N]
+
+Sample rows are created inside transactions that are rolled back, so the
+databases are left untouched.
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from rest_framework.renderers import JSONRenderer
+from camera.models import Camera, CameraCount, Room
+from camera.serializers import CameraCountSerializer
+from core.serializers import get_values_plan
+from timetable.models import Cohort, Section, Instructor, Course, TimetableEntry
+from timetable.serializers import TimetableEntrySerializer
+
+
+class Rollback(Exception):
+    """Raised to roll back the sample data"""
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer and .values() list serialization on sample rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per list (one page)')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per path')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        if rows < 1 or repeat < 1:
+            raise CommandError('--rows and --repeat must be at least 1')
+        self._run(TimetableEntry, TimetableEntrySerializer, self._timetable_rows, rows, repeat)
+        self._run(CameraCount, CameraCountSerializer, self._count_rows, rows, repeat)
+
+    def _run(self, model, serializer_class, create_rows, rows, repeat):
+        try:
+            with transaction.atomic(using=router.db_for_write(model)):
+                create_rows(rows)
+                self._compare(model, serializer_class, repeat)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _compare(self, model, serializer_class, repeat):
+        renderer = JSONRenderer()
+        plan = get_values_plan(serializer_class)
+        queryset = model.objects.order_by('pk')
+        if serializer_class is TimetableEntrySerializer:
+            queryset = queryset.select_related('cohort', 'section', 'instructor', 'course')
+        elif serializer_class is CameraCountSerializer:
+            queryset = queryset.select_related('camera', 'room')
+
+        def regular():
+            return renderer.render(serializer_class(list(queryset), many=True).data)
+
+        def fast():
+            return renderer.render(plan.to_representation(list(plan.values(queryset))))
+
+        if regular() != fast():
+            raise CommandError(f'{serializer_class.__name__}: outputs differ')
+        timings = {}
+        for name, func in (('serializer', regular), ('values', fast)):
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best * 1000
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{serializer_class.__name__}: {timings["serializer"]:.2f}ms -> '
+                f'{timings["values"]:.2f}ms per list '
+                f'({timings["serializer"] / timings["values"]:.1f}x, byte-identical)'
+            )
+        )
+
+    def _timetable_rows(self, rows):
+        cohort = Cohort.objects.create(name='Benchmark Cohort')
+        section = Section.objects.create(name='A', cohort=cohort)
+        instructor = Instructor.objects.create(name='Benchmark Instructor')
+        course = Course.objects.create(code='BENCH', name='Benchmark Course')
+        TimetableEntry.objects.bulk_create([
+            TimetableEntry(
+                cohort=cohort, section=section, instructor=instructor, course=course,
+                session='Monday', time_interval=f'{i // 60}:{i % 60:02d}-{i // 60 + 1}:{i % 60:02d}',
+                classroom='Benchmark Room'
+            )
+            for i in range(rows)
+        ])
+
+    def _count_rows(self, rows):
+        camera = Camera.objects.create(name='Benchmark Camera', ip_address='127.0.0.1')
+        room = Room.objects.create(name='Benchmark Room', camera_ip='127.0.0.1')
+        CameraCount.objects.bulk_create([
+            CameraCount(
+                camera=camera if i % 2 else None, room=None if i % 2 else room,
+                people_count=i, frames_processed=i * 30, inference_time_ms=i / 3
+            )
+            for i in range(rows)
+        ])
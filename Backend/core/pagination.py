@@ -0,0 +1,204 @@
+"""
+Keyset (cursor) pagination
+
+Unlike page-number pagination, a page is fetched with a WHERE clause on the
+ordering key of the last row seen instead of an OFFSET, and the table is never
+counted, so page 10,000 costs the same as page 1 when an index matches the
+ordering.
+"""
+import base64
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a composite key
+
+    The key is the view's ordering (from OrderingFilter, so ?ordering= still
+    works) with the primary key appended to make it unique, e.g. (-timestamp,
+    -id). NULLs sort as the smallest value. Responses look like DRF's
+    CursorPagination: {"next": url, "previous": url, "results": [...]}.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = ('-pk',)
+
+    def get_ordering(self, request, queryset, view):
+        """Ordering fields for this request, ending with the primary key"""
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        pk_name = queryset.model._meta.pk.name
+        ordering = [
+            field[:-2] + pk_name if field.lstrip('-') == 'pk' else field
+            for field in (ordering or self.ordering)
+        ]
+        if not any(field.lstrip('-') == pk_name for field in ordering):
+            ordering.append(('-' if ordering[-1].startswith('-') else '') + pk_name)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.request = request
+        self.key = [
+            (field.lstrip('-'), field.startswith('-'),
+             queryset.model._meta.get_field(field.lstrip('-')))
+            for field in self.get_ordering(request, queryset, view)
+        ]
+        values, self.reverse = self.decode_cursor(request)
+
+        # A reverse page walks the key backwards from the cursor, then flips
+        descending = [desc != self.reverse for _, desc, _ in self.key]
+        queryset = queryset.order_by(*[
+            self._order_by(name, field, desc)
+            for (name, _, field), desc in zip(self.key, descending)
+        ])
+        if values is not None:
+            queryset = queryset.filter(self._after(values, descending))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        # Walking forward, a previous page exists if we came from a cursor;
+        # walking backward, a next page always does
+        self.has_next = has_more if not self.reverse else values is not None
+        self.has_previous = values is not None if not self.reverse else has_more
+        if values is not None:
+            values = [self._encodable(value) for value in values]
+        self.first_values = self._values(results[0]) if results else values
+        self.last_values = self._values(results[-1]) if results else values
+        return results
+
+    def _order_by(self, name, field, desc):
+        if not field.null:
+            return f'-{name}' if desc else name
+        return F(name).desc(nulls_last=True) if desc else F(name).asc(nulls_first=True)
+
+    def _after(self, values, descending):
+        """Q matching rows strictly after `values` in key order"""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, _, field), value, desc in zip(self.key, values, descending):
+            if value is None:
+                # NULL sorts first: ascending every value follows it, descending none does
+                step = Q(pk__in=[]) if desc else Q(**{f'{name}__isnull': False})
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                step = Q(**{f'{name}__{"lt" if desc else "gt"}': value})
+                if desc and field.null:
+                    step |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition |= equal & step
+            equal &= same
+
+        # Restate the bound on the leading column on its own so the database
+        # can seek into the index instead of scanning it from the start
+        (name, _, field), value, desc = self.key[0], values[0], descending[0]
+        if value is not None:
+            bound = Q(**{f'{name}__{"lte" if desc else "gte"}': value})
+            if desc and field.null:
+                bound |= Q(**{f'{name}__isnull': True})
+            condition &= bound
+        return condition
+
+    def _values(self, obj):
+        values = []
+        for name, _, field in self.key:
+            # Rows may be model instances or .values() dicts (core.serializers)
+            value = obj[name] if isinstance(obj, dict) else getattr(obj, field.attname)
+            values.append(self._encodable(value))
+        return values
+
+    def _encodable(self, value):
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            return value.isoformat()
+        return value
+
+    def _to_python(self, field, value):
+        """Cursor value as the field's Python type; raises ValidationError if it is not one"""
+        if value is None:
+            if not field.null:
+                raise ValidationError('Null value for a non-null field')
+            return None
+        if isinstance(value, (list, dict)):
+            raise ValidationError('Cursor values must be scalars')
+        value = field.to_python(value)
+        field.run_validators(value)
+        # SQLite reports no integer range to the validators but overflows past 64 bits
+        if isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63:
+            raise ValidationError('Integer out of range')
+        return value
+
+    def decode_cursor(self, request):
+        """(key values or None, reverse) from the request's cursor"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values, reverse = cursor['v'], bool(cursor.get('r'))
+            if not isinstance(values, list) or len(values) != len(self.key):
+                raise ValueError
+            # Tampered values would otherwise fail inside the query
+            values = [self._to_python(field, value) for (_, _, field), value in zip(self.key, values)]
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, values, reverse):
+        cursor = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last_values, False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first_values, True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'The pagination cursor value.',
+            'schema': {'type': 'string'},
+        }]
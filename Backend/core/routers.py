@@ -0,0 +1,37 @@
+"""
+Database routers
+"""
+
+
+class CameraRouter:
+    """
+    Keep the camera app (rooms, cameras, counts) in the 'camera' database
+    Count inserts then take that file's writer lock instead of the one
+    timetable, auth and admin writes use. Camera models only relate to
+    each other, so no relation crosses databases.
+    """
+    app_labels = {'camera'}
+    database = 'camera'
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in self.app_labels:
+            return self.database
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in self.app_labels:
+            return self.database
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        routed = {obj._meta.app_label in self.app_labels for obj in (obj1, obj2)}
+        if True in routed:
+            return len(routed) == 1
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label in self.app_labels:
+            return db == self.database
+        if db == self.database:
+            return False
+        return None
@@ -0,0 +1,422 @@
+"""
+Serializer-driven querying
+
+A ModelSerializer builds every row by instantiating a model object and
+walking the field machinery (get_attribute, source traversal, SkipField...)
+for each field. For list endpoints whose serializers only use plain model
+fields, primary-key relations and dotted sources such as
+source='camera.name', the same output can be produced from one
+.values() query: the lookups and per-field converters are compiled once
+per serializer class and applied to plain dicts.
+
+The converters are the serializer's own to_representation methods and the
+None/skip rules mirror Serializer.to_representation, so the rendered JSON is
+byte-identical to the regular path.
+
+Querysets that are serialized as model instances get their select_related /
+prefetch_related / only() from the serializer's fields instead
+(get_relation_plan), and SharedNestedListSerializer serializes each
+distinct nested object of a list once. SparseFieldsetMixin lets clients
+pick fields (?fields=) and nest relations (?expand=), and the queryset is
+derived from that narrower serializer.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+# Marker for a field whose key is left out of the row, like DRF's SkipField
+SKIP = object()
+
+# Plans are cached per serializer class, and ?fields=/?expand= make a class
+# per distinct request shape, so the caches are bounded
+PLAN_CACHE_SIZE = 512
+
+
+class ValuesPlan:
+    """
+    Compiled .values() lookups and converters for one serializer class
+    Build with get_values_plan(), which returns None when a field cannot
+    be served from .values() rows (method fields, nested serializers...).
+    """
+    def __init__(self, columns, lookups):
+        # columns: (field_name, value lookup, null-guard lookups, convert, on_missing)
+        self.columns = columns
+        self.lookups = lookups
+
+    def values(self, queryset, extra=()):
+        """The .values() queryset holding every column (plus `extra` lookups)"""
+        return queryset.values(*dict.fromkeys(list(self.lookups) + list(extra)))
+
+    def to_representation(self, rows):
+        """Serialize .values() rows, same output as serializer(many=True).data"""
+        results = []
+        for row in rows:
+            item = {}
+            for name, lookup, guards, convert, on_missing in self.columns:
+                # A null foreign key on the way: DRF's get_attribute fails there
+                if guards and any(row[guard] is None for guard in guards):
+                    if on_missing is SKIP:
+                        continue
+                    value = on_missing
+                else:
+                    value = row[lookup]
+                item[name] = None if value is None else convert(value)
+            results.append(item)
+        return results
+
+
+def _identity(value):
+    return value
+
+
+def _compile_field(model, field):
+    """Column tuple for one serializer field, or None if it needs the model instance"""
+    if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField,
+                          serializers.ManyRelatedField, serializers.HiddenField)):
+        return None
+    if field.source == '*' or not field.source_attrs:
+        return None
+    if isinstance(field, serializers.RelatedField) and not isinstance(field, PrimaryKeyRelatedField):
+        return None
+
+    # Walk the source through forward relations; every hop must be a model field
+    current, guards, path = model, [], []
+    for position, attr in enumerate(field.source_attrs):
+        try:
+            model_field = current._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if model_field.many_to_many or model_field.one_to_many or getattr(model_field, 'column', None) is None:
+            return None
+        path.append(attr)
+        last = position == len(field.source_attrs) - 1
+        if model_field.is_relation:
+            if last:
+                if not isinstance(field, PrimaryKeyRelatedField):
+                    return None
+                break
+            if model_field.null:
+                guards.append('__'.join(path))
+            current = model_field.related_model
+        elif not last:
+            return None
+    if isinstance(field, PrimaryKeyRelatedField):
+        convert = field.pk_field.to_representation if field.pk_field is not None else _identity
+    elif model_field.is_relation:
+        return None
+    else:
+        convert = field.to_representation
+
+    # What Field.get_attribute does when the traversal hits None; only
+    # reachable through a nullable relation
+    on_missing = SKIP
+    if guards:
+        if field.default is not empty:
+            on_missing = field.get_default()
+        elif field.allow_null:
+            on_missing = None
+        elif not field.required:
+            on_missing = SKIP
+        else:
+            return None
+    return (field.field_name, '__'.join(path), tuple(guards), convert, on_missing)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def get_values_plan(serializer_class):
+    """ValuesPlan for a ModelSerializer class, or None if it needs model instances"""
+    meta = getattr(serializer_class, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    if model is None:
+        return None
+    columns = []
+    lookups = []
+    for field in serializer_class()._readable_fields:
+        column = _compile_field(model, field)
+        if column is None:
+            return None
+        columns.append(column)
+        lookups.append(column[1])
+        lookups.extend(column[2])
+    return ValuesPlan(columns, lookups)
+
+
+def _pagination_key(view, queryset):
+    """Fields a keyset paginator reads from every row of `view`, if it uses one"""
+    paginator = view.paginator
+    if paginator is None or not hasattr(paginator, 'get_ordering'):
+        return []
+    return [field.lstrip('-') for field in paginator.get_ordering(view.request, queryset, view)]
+
+
+class ValuesListMixin:
+    """
+    Opt-in fast path for list endpoints of a ModelViewSet
+    Rows are built from .values() with a precompiled ValuesPlan instead of
+    model instances; serializers that need instances fall back to the
+    regular path. Works with page-number and keyset pagination.
+    """
+    def list(self, request, *args, **kwargs):
+        return self.values_list_response(self.filter_queryset(self.get_queryset()))
+
+    def values_list_response(self, queryset):
+        """Paginated (when configured) list response for `queryset`"""
+        plan = get_values_plan(self.get_serializer_class())
+        if plan is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        # Keyset pagination reads its key from each row, so fetch it too
+        rows = plan.values(queryset, _pagination_key(self, queryset))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.to_representation(page))
+        return Response(plan.to_representation(rows))
+
+
+class RelationPlan:
+    """
+    Relations and columns a serializer reads, from get_relation_plan()
+    select_related / prefetch_related are lookups to join or prefetch; only
+    is the column list for QuerySet.only() (empty when everything is read).
+    """
+    def __init__(self, select_related, prefetch_related, only):
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+        self.only = only
+
+    def apply(self, queryset, extra=()):
+        """
+        `queryset` with the joins, prefetches and column restriction added
+        `extra` names more columns to load, e.g. a pagination key.
+        """
+        # Columns can only be restricted when every join is ours, otherwise a
+        # relation the queryset already selects may get deferred
+        restrict = bool(self.only) and queryset.query.select_related is False
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if restrict:
+            queryset = queryset.only(*self.only, *extra)
+        return queryset
+
+
+def _all_columns(model, prefix, columns):
+    columns.update(prefix + field.name for field in model._meta.concrete_fields)
+
+
+def _collect_relations(serializer, model, prefix, select, prefetch, columns):
+    """Add what `serializer` reads from `model` rows reached through `prefix`"""
+    meta = getattr(serializer, 'Meta', None)
+    # Declared needs of method fields, which cannot be derived: they may read
+    # any column of the models they join
+    prefetch.update(prefix + path for path in getattr(meta, 'prefetch_related', ()))
+    for path in getattr(meta, 'select_related', ()):
+        select.add(prefix + path)
+        current, name = model, prefix
+        for attr in path.split('__'):
+            columns.add(name + attr)
+            current, name = current._meta.get_field(attr).related_model, name + attr + '__'
+            _all_columns(current, name, columns)
+
+    for field in serializer._readable_fields:
+        if field.source == '*':
+            if isinstance(field, serializers.Serializer):
+                _collect_relations(field, model, prefix, select, prefetch, columns)
+            else:
+                # Method fields get the whole instance
+                _all_columns(model, prefix, columns)
+            continue
+
+        current, path = model, []
+        for position, attr in enumerate(field.source_attrs):
+            last = position == len(field.source_attrs) - 1
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                # A property or method may read any column
+                _all_columns(current, prefix + ''.join(p + '__' for p in path), columns)
+                break
+            path.append(attr)
+            name = prefix + '__'.join(path)
+            if not model_field.concrete or model_field.many_to_many:
+                prefetch.add(name)
+                break
+            columns.add(name)
+            if not model_field.is_relation:
+                break
+            if last and isinstance(field, (PrimaryKeyRelatedField, serializers.ManyRelatedField)):
+                break
+            select.add(name)
+            current = model_field.related_model
+            if last:
+                if isinstance(field, serializers.Serializer):
+                    _collect_relations(field, current, name + '__', select, prefetch, columns)
+                else:
+                    _all_columns(current, name + '__', columns)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def get_relation_plan(serializer_class):
+    """
+    RelationPlan for a ModelSerializer class, or None without a Meta.model
+    Forward relations the fields traverse (dotted sources, nested
+    serializers) are joined and only the columns read are loaded; reverse
+    and many-to-many relations are prefetched. SerializerMethodFields
+    declare the relations they follow in Meta.select_related /
+    Meta.prefetch_related.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    if model is None:
+        return None
+    select, prefetch, columns = set(), set(), set()
+    _collect_relations(serializer_class(), model, '', select, prefetch, columns)
+    # A join path implies its parents: keep only the longest ones
+    select_related = sorted(
+        path for path in select
+        if not any(other.startswith(path + '__') for other in select)
+    )
+    only = sorted(columns)
+    if all(column in columns for column in (f.name for f in model._meta.concrete_fields)) and not select:
+        only = []
+    return RelationPlan(tuple(select_related), tuple(sorted(prefetch)), tuple(only))
+
+
+def optimize_queryset(queryset, serializer_class, extra=()):
+    """`queryset` with what `serializer_class` reads joined, prefetched and restricted"""
+    plan = get_relation_plan(serializer_class)
+    if plan is None:
+        return queryset
+    return plan.apply(queryset, extra)
+
+
+class RelationQuerysetMixin:
+    """
+    Derive select_related/prefetch_related/only() from the serializer
+    Add to a GenericAPIView so get_queryset() fetches what the view's
+    serializer reads, instead of one query per row and relation.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return optimize_queryset(
+            queryset, self.get_serializer_class(), _pagination_key(self, queryset)
+        )
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _field_names(serializer_class):
+    return tuple(serializer_class().fields)
+
+
+def _split_param(value):
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def get_fieldset_serializer(serializer_class, fields=None, expand=()):
+    """
+    Subclass of `serializer_class` limited to `fields` with `expand` nested
+    `fields` is a tuple of field names (None for all of them); `expand` names
+    relations from Meta.expandable_fields to render as nested objects
+    instead of primary keys. Expanded fields are always included.
+    """
+    meta = serializer_class.Meta
+    names = list(_field_names(serializer_class))
+    if fields is not None:
+        names = [name for name in names if name in fields or name in expand]
+    attrs = {
+        name: nested(read_only=True)
+        for name, nested in getattr(meta, 'expandable_fields', {}).items()
+        if name in expand
+    }
+    meta_attrs = {'fields': names, 'exclude': None}
+    if expand and not hasattr(meta, 'list_serializer_class'):
+        meta_attrs['list_serializer_class'] = SharedNestedListSerializer
+    attrs['Meta'] = type('Meta', (meta,), meta_attrs)
+    return type(serializer_class.__name__, (serializer_class,), attrs)
+
+
+class SparseFieldsetMixin(RelationQuerysetMixin):
+    """
+    ?fields= and ?expand= for the read actions of a ModelViewSet
+    ?fields=id,name returns only those fields; ?expand=cohort renders a
+    relation listed in the serializer's Meta.expandable_fields as a nested
+    object. The queryset is then derived from the fields actually returned
+    (RelationQuerysetMixin), so dropped fields are not loaded and expanded
+    ones are joined instead of fetched per row.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    fieldset_actions = ('list', 'retrieve')
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        request = getattr(self, 'request', None)
+        if request is None or getattr(self, 'action', None) not in self.fieldset_actions:
+            return serializer_class
+        fields = _split_param(request.query_params.get(self.fields_query_param))
+        expand = _split_param(request.query_params.get(self.expand_query_param))
+        if not fields and not expand:
+            return serializer_class
+
+        available = _field_names(serializer_class)
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            raise ValidationError({
+                self.fields_query_param: f"Unknown field(s): {', '.join(unknown)}"
+            })
+        expandable = getattr(serializer_class.Meta, 'expandable_fields', {})
+        unknown = [name for name in expand if name not in expandable]
+        if unknown:
+            raise ValidationError({
+                self.expand_query_param: f"Cannot expand: {', '.join(unknown)}"
+            })
+        return get_fieldset_serializer(
+            serializer_class,
+            tuple(sorted(set(fields))) if fields else None,
+            tuple(sorted(set(expand))),
+        )
+
+
+class SharedNestedListSerializer(serializers.ListSerializer):
+    """
+    List serializer that serializes each distinct nested object once
+    Rows pointing at the same camera or room reuse one representation
+    instead of running the nested serializer again. Set it as
+    Meta.list_serializer_class of the row serializer.
+    """
+    def to_representation(self, data):
+        nested = [
+            field for field in self.child._readable_fields
+            if isinstance(field, serializers.Serializer)
+        ]
+        for field in nested:
+            field.to_representation = self._shared(field.to_representation)
+        try:
+            return super().to_representation(data)
+        finally:
+            for field in nested:
+                del field.to_representation
+
+    @staticmethod
+    def _shared(to_representation):
+        cache = {}
+
+        def shared(instance):
+            key = getattr(instance, 'pk', None)
+            if key is None:
+                return to_representation(instance)
+            if key not in cache:
+                cache[key] = to_representation(instance)
+            return cache[key]
+        return shared
@@ -0,0 +1,38 @@
+"""
+Work deferred until the current transaction commits
+"""
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+class OnCommitBatch:
+    """
+    Pools keys marked during a transaction and flushes them once on commit
+
+    mark(using, name=keys, ...) adds keys to named sets pooled per thread and
+    database; when the transaction commits, flush(using, name=set, ...) runs
+    inside a new atomic block with everything marked so far, so a cascade
+    of signals does each piece of work once.
+    """
+    def __init__(self, flush):
+        self.flush = flush
+        self._pending = threading.local()
+
+    def mark(self, using=None, **keys):
+        using = using or DEFAULT_DB_ALIAS
+        if not hasattr(self._pending, 'batches'):
+            self._pending.batches = {}
+        batch = self._pending.batches.setdefault(using, {})
+        for name, values in keys.items():
+            batch.setdefault(name, set()).update(values)
+        # Registered every time: if an earlier transaction rolled back its callback
+        # was dropped, and leftover marks just get flushed with the next commit
+        transaction.on_commit(lambda: self._run(using), using=using)
+
+    def _run(self, using):
+        batch = getattr(self._pending, 'batches', {}).pop(using, None)
+        if not batch or not any(batch.values()):
+            return
+        with transaction.atomic(using=using):
+            self.flush(using, **batch)
@@ -7,3 +7,12 @@ from django.apps import AppConfig
 class TimetableConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'timetable'
+
+    def ready(self):
+        # Signal handlers that keep the materialized read models current
+        from . import read_models  # noqa: F401
+        
+        # Hot reload of timetable.json for processes that serve requests
+        from .watcher import should_watch, start_watcher
+        if should_watch():
+            start_watcher()
@@ -0,0 +1,84 @@
+"""
+Instructor and classroom double-booking detection
+Sessions are grouped per (term, day, instructor) and (term, day, classroom)
+and each group is swept once in start order, so a check is O(n log n + k)
+for n sessions and k conflicts.
+"""
+import heapq
+
+from .intervals import format_minutes, parse_time_interval
+from .occupancy import NO_CLASSROOM
+from .store import describe_session
+
+# (kind, session field holding the resource, fields that must match for two
+# bookings of that resource to be one combined session taught to several sections)
+CONFLICT_KINDS = (
+    ('instructor', 'Instructor', ('Course', 'Classroom')),
+    ('classroom', 'Classroom', ('Course', 'Instructor')),
+)
+
+
+def _group_bookings(sessions, field, shared_fields):
+    """
+    Group sessions into {(term, day, resource): [(start, end, refs)]}
+
+    Sessions with the same interval and shared fields are merged into one
+    booking, since a lecture given to several sections at once is not a clash.
+    """
+    groups = {}
+    for ref in sessions:
+        resource = ref.data.get(field)
+        if not isinstance(resource, str) or resource in ('', NO_CLASSROOM):
+            continue
+        try:
+            start, end = parse_time_interval(ref.data.get('Time'))
+        except ValueError:
+            continue
+        shared_key = (start, end) + tuple(ref.data.get(name) for name in shared_fields)
+        bookings = groups.setdefault((ref.term, ref.day, resource), {})
+        bookings.setdefault(shared_key, (start, end, []))[2].append(ref)
+    return {key: list(bookings.values()) for key, bookings in groups.items()}
+
+
+def _sweep(bookings):
+    """Yield (a, b) pairs of overlapping bookings, sweeping in start order"""
+    bookings.sort(key=lambda booking: (booking[0], booking[1]))
+    active = []  # heap of (end, position)
+    for position, booking in enumerate(bookings):
+        start = booking[0]
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other in active:
+            yield bookings[other], booking
+        heapq.heappush(active, (booking[1], position))
+
+
+def find_conflicts(snapshot):
+    """
+    Return every instructor and classroom double-booking in a snapshot
+
+    Each conflict lists the resource, the overlapping minutes and the
+    sessions on both sides (several when a combined session is involved).
+    """
+    conflicts = []
+    for kind, field, shared_fields in CONFLICT_KINDS:
+        groups = _group_bookings(snapshot.sessions, field, shared_fields)
+        for (term, day, resource), bookings in groups.items():
+            if len(bookings) < 2:
+                continue
+            for first, second in _sweep(bookings):
+                conflicts.append({
+                    'type': kind,
+                    'resource': resource,
+                    'term': term,
+                    'day': day,
+                    'start': format_minutes(max(first[0], second[0])),
+                    'end': format_minutes(min(first[1], second[1])),
+                    'sessions': [describe_session(ref) for ref in first[2] + second[2]],
+                })
+    return conflicts
+
+
+def get_conflicts(snapshot):
+    """Conflicts of a snapshot, computed once per timetable version"""
+    return snapshot.derived('conflicts', find_conflicts)
@@ -0,0 +1,26 @@
+"""
+Timetable app filters
+"""
+import django_filters
+
+from .models import TimetableEntry
+
+
+class TimetableEntryFilter(django_filters.FilterSet):
+    """
+    Filters for timetable entries
+    start_after/end_before take times like 9:00 and compare the indexed
+    minute columns, so "10:30" correctly sorts after "9:00".
+    """
+    start_after = django_filters.TimeFilter(method='filter_start_after')
+    end_before = django_filters.TimeFilter(method='filter_end_before')
+
+    class Meta:
+        model = TimetableEntry
+        fields = ['cohort', 'section', 'instructor', 'course', 'session', 'type']
+
+    def filter_start_after(self, queryset, name, value):
+        return queryset.filter(start_minute__gte=value.hour * 60 + value.minute)
+
+    def filter_end_before(self, queryset, name, value):
+        return queryset.filter(end_minute__lte=value.hour * 60 + value.minute)
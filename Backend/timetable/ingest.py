@@ -0,0 +1,331 @@
+"""
+Timetable ingestion: normalize timetable JSON into rows and sync them in bulk
+
+Parsing is pure and lives in module-level functions so several files can be
+parsed in worker processes; all rows then go through one BulkTimetableWriter.
+"""
+import glob
+import hashlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .intervals import parse_time_interval
+from .models import Cohort, Section, Instructor, Course, TimetableEntry
+from .read_models import mark_dirty
+
+# One session of the timetable JSON, normalized for the database
+TimetableRow = namedtuple('TimetableRow', [
+    'term', 'cohort', 'section', 'day', 'session_key', 'course', 'course_code',
+    'instructor', 'time_interval', 'start_minute', 'end_minute', 'type', 'classroom',
+])
+
+# Row fields covered by a record's content hash
+HASHED_FIELDS = ('cohort', 'section', 'course', 'instructor', 'time_interval', 'type', 'classroom')
+
+# Columns rewritten when a record's content changes
+SYNCED_FIELDS = [
+    'instructor', 'course', 'time_interval', 'start_minute', 'end_minute', 'type', 'classroom',
+    'term', 'session_key', 'content_hash', 'updated_at',
+]
+
+
+def extract_course_code(course_name):
+    """Extract a course code from course name"""
+    # Create a simple code from the first letters of each word
+    words = course_name.split()
+    code = ''.join([word[0].upper() for word in words if word])
+    return code[:20] if code else 'UNKNOWN'
+
+
+def row_hash(row):
+    """Content hash of a TimetableRow, stored on its TimetableEntry"""
+    content = '\x1f'.join(getattr(row, name) for name in HASHED_FIELDS)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def parse_timetable(data):
+    """
+    Normalize timetable JSON into TimetableRows
+
+    Returns (rows, warnings). Sections whose name is not
+    "<cohort>_Section_<letter>" are skipped with a warning.
+    """
+    rows = []
+    warnings = []
+    for term, sections in data.items():
+        for section_name, days in sections.items():
+            # Extract cohort and section info
+            parts = section_name.split('_Section_')
+            if len(parts) != 2:
+                warnings.append(f'Skipping invalid section name: {section_name}')
+                continue
+            cohort_name, section_letter = parts
+
+            for day, sessions in days.items():
+                for session_key, session_data in sessions.items():
+                    if not isinstance(session_data, dict):
+                        warnings.append(f'Skipping invalid session: {section_name} {day} {session_key}')
+                        continue
+                    course_name = session_data.get('Course', 'Unknown')
+                    time_interval = session_data.get('Time', '00:00-00:00')
+                    try:
+                        start_minute, end_minute = parse_time_interval(time_interval)
+                    except ValueError as e:
+                        start_minute = end_minute = None
+                        warnings.append(f'{section_name} {day} {session_key}: {str(e)}')
+                    rows.append(TimetableRow(
+                        term=term,
+                        cohort=cohort_name,
+                        section=section_letter,
+                        day=day,
+                        session_key=session_key,
+                        course=course_name,
+                        course_code=extract_course_code(course_name),
+                        instructor=session_data.get('Instructor', 'Unknown'),
+                        time_interval=time_interval,
+                        start_minute=start_minute,
+                        end_minute=end_minute,
+                        type=session_data.get('Type', 'Lecture'),
+                        classroom=session_data.get('Classroom', 'N/A'),
+                    ))
+    return rows, warnings
+
+
+def parse_timetable_file(path):
+    """
+    Read and normalize one timetable JSON file
+    Runs in worker processes; raises ValueError naming the file on bad input.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f'{path}: {str(e)}')
+    if not isinstance(data, dict):
+        raise ValueError(f'{path}: top level must be an object of terms')
+    rows, warnings = parse_timetable(data)
+    return rows, [f'{os.path.basename(path)}: {warning}' for warning in warnings]
+
+
+def find_timetable_files(pattern):
+    """
+    Expand a file, directory or glob pattern into timetable JSON paths
+    A directory yields every *.json file directly inside it.
+    """
+    if os.path.isdir(pattern):
+        return sorted(glob.glob(os.path.join(pattern, '*.json')))
+    if glob.has_magic(pattern):
+        return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return [pattern] if os.path.isfile(pattern) else []
+
+
+def parse_timetable_files(paths, workers=None):
+    """
+    Parse several timetable files, in a process pool when there are several
+    Returns (rows, warnings) in the order of `paths`. Each worker runs
+    django.setup() first, so this also works with the spawn start method.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        results = [parse_timetable_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            results = list(executor.map(parse_timetable_file, paths))
+    rows = []
+    warnings = []
+    for file_rows, file_warnings in results:
+        rows.extend(file_rows)
+        warnings.extend(file_warnings)
+    return rows, warnings
+
+
+class BulkTimetableWriter:
+    """
+    Syncs TimetableRows into the database inside one transaction
+
+    Cohorts, sections, instructors and courses are resolved from in-memory
+    maps and only the missing ones are bulk-created. Each entry remembers
+    the (term, section, day, session) record it came from and a hash of its
+    content, so a re-run only inserts new records, updates changed ones and,
+    with delete_missing, deletes records that left the file. Unchanged rows
+    are not written at all.
+    """
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+
+    def _resolve_by_name(self, model, names):
+        """Map name -> id for `names`, bulk-creating the missing ones"""
+        ids = dict(model.objects.filter(name__in=names).values_list('name', 'id'))
+        missing = [name for name in names if name not in ids]
+        model.objects.bulk_create([model(name=name) for name in missing], batch_size=self.batch_size)
+        if missing:
+            ids.update(model.objects.filter(name__in=missing).values_list('name', 'id'))
+        return ids, len(missing)
+
+    def write(self, rows, clear=False, delete_missing=False):
+        """
+        Write rows and return a dict of counts
+        With clear=True existing entries are deleted in the same transaction,
+        so readers never observe an empty timetable. With delete_missing=True
+        entries of the loaded terms that are no longer in `rows` are deleted.
+        """
+        stats = {}
+        with transaction.atomic():
+            if clear:
+                stats['deleted'], _ = TimetableEntry.objects.all().delete()
+
+            cohort_names = list(dict.fromkeys(row.cohort for row in rows))
+            cohort_ids, stats['cohorts_created'] = self._resolve_by_name(Cohort, cohort_names)
+
+            section_keys = list(dict.fromkeys((cohort_ids[row.cohort], row.section) for row in rows))
+            section_ids = {
+                (cohort_id, name): pk
+                for pk, cohort_id, name in Section.objects.filter(
+                    cohort_id__in=set(cohort_ids.values())
+                ).values_list('id', 'cohort_id', 'name')
+            }
+            missing_sections = [key for key in section_keys if key not in section_ids]
+            Section.objects.bulk_create(
+                [Section(cohort_id=cohort_id, name=name) for cohort_id, name in missing_sections],
+                batch_size=self.batch_size
+            )
+            if missing_sections:
+                section_ids.update({
+                    (cohort_id, name): pk
+                    for pk, cohort_id, name in Section.objects.filter(
+                        cohort_id__in={cohort_id for cohort_id, _ in missing_sections}
+                    ).values_list('id', 'cohort_id', 'name')
+                })
+            stats['sections_created'] = len(missing_sections)
+
+            instructor_names = list(dict.fromkeys(row.instructor for row in rows))
+            instructor_ids, stats['instructors_created'] = self._resolve_by_name(Instructor, instructor_names)
+
+            # Course codes are derived from names; the first name seen for a code wins
+            course_names = {}
+            for row in rows:
+                course_names.setdefault(row.course_code, row.course)
+            course_ids = dict(Course.objects.filter(code__in=course_names).values_list('code', 'id'))
+            missing_codes = [code for code in course_names if code not in course_ids]
+            Course.objects.bulk_create(
+                [Course(code=code, name=course_names[code]) for code in missing_codes],
+                batch_size=self.batch_size
+            )
+            if missing_codes:
+                course_ids.update(Course.objects.filter(code__in=missing_codes).values_list('code', 'id'))
+            stats['courses_created'] = len(missing_codes)
+
+            entries = {}
+            unique_keys = set()
+            for row in rows:
+                cohort_id = cohort_ids[row.cohort]
+                section_id = section_ids[(cohort_id, row.section)]
+                instructor_id = instructor_ids[row.instructor]
+                # Duplicate keys in the input: keep the first, as get_or_create did
+                unique_key = (row.term, cohort_id, section_id, instructor_id, row.day, row.time_interval)
+                if unique_key in unique_keys:
+                    continue
+                unique_keys.add(unique_key)
+                entries.setdefault((row.term, section_id, row.day, row.session_key), (row, TimetableEntry(
+                    cohort_id=cohort_id, section_id=section_id, instructor_id=instructor_id,
+                    course_id=course_ids[row.course_code], session=row.day,
+                    time_interval=row.time_interval, start_minute=row.start_minute,
+                    end_minute=row.end_minute, type=row.type, classroom=row.classroom,
+                    term=row.term, session_key=row.session_key, content_hash=row_hash(row),
+                )))
+
+            created, updated, deleted = self._sync_entries(
+                {key: entry for key, (_, entry) in entries.items()}, delete_missing
+            )
+            stats['entries_created'] = len(created)
+            stats['entries_updated'] = updated
+            stats['entries_unchanged'] = len(entries) - len(created) - updated
+            stats['entries_deleted'] = deleted
+            stats['new_rows'] = [entries[key][0] for key in created]
+        return stats
+
+    def _sync_entries(self, entries, delete_missing):
+        """
+        Apply {record key: unsaved TimetableEntry} as a diff against the database
+        Returns (created record keys, updated count, deleted count).
+
+        Existing rows are matched by record key first, then by the unique
+        (term, cohort, section, instructor, session, time_interval) key, which
+        adopts sessions renumbered within a day, and finally by that key with
+        a blank term, which adopts rows loaded before records were tracked.
+        Rows of other terms are never matched.
+        """
+        terms = {key[0] for key in entries}
+        section_ids = {key[1] for key in entries}
+        existing = list(TimetableEntry.objects.filter(
+            Q(section_id__in=section_ids) | Q(term__in=terms)
+        ).values_list(
+            'id', 'term', 'section_id', 'session', 'session_key', 'content_hash',
+            'cohort_id', 'instructor_id', 'time_interval',
+        ))
+        by_record = {}
+        by_unique = {}
+        for pk, term, section_id, session, session_key, content_hash, cohort_id, instructor_id, time_interval in existing:
+            if term:
+                by_record[(term, section_id, session, session_key)] = (pk, content_hash)
+            by_unique[(term, cohort_id, section_id, instructor_id, session, time_interval)] = (pk, content_hash)
+
+        claimed = set()
+        to_create = []
+        to_update = []
+        now = timezone.now()
+        for key, entry in entries.items():
+            match = by_record.get(key)
+            unique = (entry.cohort_id, entry.section_id, entry.instructor_id,
+                      entry.session, entry.time_interval)
+            if match is None or match[0] in claimed:
+                match = by_unique.get((entry.term,) + unique)
+            if match is None or match[0] in claimed:
+                match = by_unique.get(('',) + unique)
+            if match is None or match[0] in claimed:
+                entry.created_at = entry.updated_at = now
+                to_create.append((key, entry))
+                continue
+            pk, content_hash = match
+            claimed.add(pk)
+            if content_hash != entry.content_hash or by_record.get(key, (None,))[0] != pk:
+                entry.pk = pk
+                entry.updated_at = now
+                to_update.append(entry)
+
+        deleted = 0
+        if delete_missing:
+            # Only records of the loaded terms (and untracked rows of the loaded
+            # sections) can go missing; other terms are left alone
+            stale = [
+                pk for pk, term, section_id, *_ in existing
+                if pk not in claimed and (term in terms or (not term and section_id in section_ids))
+            ]
+            for start in range(0, len(stale), self.batch_size):
+                deleted += TimetableEntry.objects.filter(
+                    pk__in=stale[start:start + self.batch_size]
+                ).delete()[0]
+
+        TimetableEntry.objects.bulk_update(to_update, SYNCED_FIELDS, batch_size=self.batch_size)
+        TimetableEntry.objects.bulk_create([entry for _, entry in to_create], batch_size=self.batch_size)
+
+        # Bulk queries send no signals: mark the read models of written entries
+        # (deletes went through signals), old owners included for updates
+        owners = {pk: (cohort_id, section_id, instructor_id)
+                  for pk, _, section_id, _, _, _, cohort_id, instructor_id, _ in existing}
+        written = to_update + [entry for _, entry in to_create]
+        touched = {owners[entry.pk] for entry in to_update}
+        touched.update((entry.cohort_id, entry.section_id, entry.instructor_id) for entry in written)
+        if touched:
+            mark_dirty(
+                section_keys={(cohort_id, section_id) for cohort_id, section_id, _ in touched},
+                instructor_ids={instructor_id for _, _, instructor_id in touched},
+            )
+        return [key for key, _ in to_create], len(to_update), deleted
@@ -0,0 +1,40 @@
+"""
+Time parsing helpers for timetable sessions
+Session times are stored as strings such as "9:00-10:00"; these helpers turn
+them into minutes since midnight so they can be compared and sorted.
+"""
+
+
+def parse_time(value):
+    """
+    Parse "H:MM" or "HH:MM" into minutes since midnight
+    Raises ValueError for anything else.
+    """
+    hours, sep, minutes = value.strip().partition(':')
+    if not sep or not hours.isdigit() or not minutes.isdigit():
+        raise ValueError(f'Invalid time "{value}"')
+    hours, minutes = int(hours), int(minutes)
+    if hours > 24 or minutes > 59 or (hours == 24 and minutes):
+        raise ValueError(f'Invalid time "{value}"')
+    return hours * 60 + minutes
+
+
+def parse_time_interval(value):
+    """
+    Parse "9:00-10:00" into a (start, end) pair of minutes since midnight
+    Raises ValueError if the string is malformed or the interval is empty.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f'Invalid time interval {value!r}')
+    start, sep, end = value.partition('-')
+    if not sep:
+        raise ValueError(f'Invalid time interval "{value}"')
+    start, end = parse_time(start), parse_time(end)
+    if end <= start:
+        raise ValueError(f'Invalid time interval "{value}"')
+    return start, end
+
+
+def format_minutes(minutes):
+    """Format minutes since midnight as "H:MM", matching the timetable style"""
+    return f'{minutes // 60}:{minutes % 60:02d}'
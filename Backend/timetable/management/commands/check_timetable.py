@@ -0,0 +1,51 @@
+"""
+Django management command to check the timetable for double-bookings
+Usage: python manage.py check_timetable [--json-file PATH]
+
+Exits with an error when an instructor or classroom is booked for two
+overlapping sessions on the same day of the same term.
+"""
+import os
+from django.core.management.base import BaseCommand, CommandError
+from timetable.conflicts import get_conflicts
+from timetable.store import TimetableStore, timetable_store
+
+
+class Command(BaseCommand):
+    help = 'Check timetable JSON for instructor and classroom conflicts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json-file',
+            type=str,
+            help='Path to JSON file to check (defaults to the file the API serves)',
+            default=None
+        )
+
+    def handle(self, *args, **options):
+        json_file = options.get('json_file')
+        if json_file:
+            if not os.path.exists(json_file):
+                raise CommandError(f'JSON file not found: {json_file}')
+            snapshot = TimetableStore(paths=[json_file]).get()
+        else:
+            snapshot = timetable_store.get()
+
+        if not snapshot.data:
+            raise CommandError('No timetable data could be loaded')
+
+        conflicts = get_conflicts(snapshot)
+        for conflict in conflicts:
+            sections = ', '.join(sorted({s['section'] for s in conflict['sessions']}))
+            self.stdout.write(
+                self.style.ERROR(
+                    f"  [-] {conflict['type'].capitalize()} {conflict['resource']}: "
+                    f"{conflict['day']} {conflict['start']}-{conflict['end']} ({sections})"
+                )
+            )
+
+        if conflicts:
+            raise CommandError(f'Found {len(conflicts)} timetable conflicts')
+        self.stdout.write(
+            self.style.SUCCESS(f'No conflicts in {len(snapshot.sessions)} sessions')
+        )
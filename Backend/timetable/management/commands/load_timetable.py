@@ -1,12 +1,21 @@
 """
 Django management command to load timetable data from JSON file
-Usage: python manage.py load_timetable
+Usage: python manage.py load_timetable [--json-file PATH|DIR|GLOB] [--sync] [--summary] [--batch-size N] [--workers N]
+
+The whole file is written in one transaction with bulk queries: a failed
+load leaves the database untouched. Entries remember a hash of the session
+they came from, so a re-run only writes sessions that changed; --sync also
+deletes sessions that were removed from the file.
+
+Several files (a directory or glob, e.g. one file per faculty and term) are
+parsed in parallel worker processes and written together.
 """
-import json
 import os
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from timetable.models import Cohort, Section, Instructor, Course, TimetableEntry
+from timetable.ingest import (
+    BulkTimetableWriter, extract_course_code, find_timetable_files, parse_timetable_files
+)
 
 
 class Command(BaseCommand):
@@ -16,126 +25,105 @@ class Command(BaseCommand):
         parser.add_argument(
             '--json-file',
             type=str,
-            help='Path to JSON file to load',
+            help='JSON file, directory of JSON files or glob pattern to load',
             default=None
         )
         parser.add_argument(
             '--clear',
             action='store_true',
-            help='Clear existing timetable data before loading',
+            help='Clear existing timetable data before loading (--sync avoids the delete-all)',
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Delete entries of the loaded terms that are no longer in the file(s); '
+                 'load every file of a term together',
+        )
+        parser.add_argument(
+            '--summary',
+            action='store_true',
+            help='Only print totals instead of one line per created entry',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Number of rows per bulk INSERT',
+            default=500
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Processes used to parse several files (defaults to the CPU count)',
+            default=None
         )
 
     def handle(self, *args, **options):
         # Get JSON file path
         json_file = options.get('json_file')
-        
+
         if not json_file:
             # Try default locations
             json_file = os.path.join(settings.BASE_DIR, '../Frontend/data/timetable.json')
             if not os.path.exists(json_file):
                 json_file = os.path.join(settings.BASE_DIR, 'timetable.json')
-        
-        if not os.path.exists(json_file):
+
+        json_files = find_timetable_files(json_file)
+        if not json_files:
             raise CommandError(f'JSON file not found: {json_file}')
-        
-        # Clear existing data if requested
-        if options.get('clear'):
-            self.stdout.write(self.style.WARNING('Clearing existing timetable data...'))
-            TimetableEntry.objects.all().delete()
-            self.stdout.write(self.style.SUCCESS('Timetable data cleared'))
-        
+
+        batch_size = options.get('batch_size')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        workers = options.get('workers')
+        if workers is not None and workers < 1:
+            raise CommandError('--workers must be at least 1')
+        summary = options.get('summary')
+
         # Load JSON
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            rows, warnings = parse_timetable_files(json_files, workers=workers)
         except Exception as e:
             raise CommandError(f'Error loading JSON file: {str(e)}')
-        
-        # Parse and load data
-        total_entries = 0
-        
-        for term, sections in data.items():
-            self.stdout.write(f'Processing term: {term}')
-            
-            for section_name, days in sections.items():
-                # Extract cohort and section info
-                parts = section_name.split('_Section_')
-                if len(parts) != 2:
-                    self.stdout.write(self.style.WARNING(f'  Skipping invalid section name: {section_name}'))
-                    continue
-                
-                cohort_name = parts[0]
-                section_letter = parts[1]
-                
-                # Get or create cohort
-                cohort, _ = Cohort.objects.get_or_create(name=cohort_name)
-                
-                # Get or create section
-                section, _ = Section.objects.get_or_create(
-                    name=section_letter,
-                    cohort=cohort
+
+        for warning in warnings:
+            self.stdout.write(self.style.WARNING(f'  {warning}'))
+
+        if options.get('clear'):
+            self.stdout.write(self.style.WARNING('Clearing existing timetable data...'))
+
+        try:
+            stats = BulkTimetableWriter(batch_size=batch_size).write(
+                rows, clear=options.get('clear'), delete_missing=options.get('sync')
+            )
+        except Exception as e:
+            raise CommandError(f'Error writing timetable entries, nothing was loaded: {str(e)}')
+
+        if options.get('clear'):
+            self.stdout.write(self.style.SUCCESS(f'Timetable data cleared ({stats["deleted"]} rows)'))
+
+        if not summary:
+            for row in stats['new_rows']:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'  [+] Created: {row.cohort} {row.section} - '
+                        f'{row.day} {row.time_interval} - {row.course}'
+                    )
                 )
-                
-                # Process sessions
-                for day, sessions in days.items():
-                    for session_key, session_data in sessions.items():
-                        try:
-                            course_name = session_data.get('Course', 'Unknown')
-                            instructor_name = session_data.get('Instructor', 'Unknown')
-                            time_interval = session_data.get('Time', '00:00-00:00')
-                            session_type = session_data.get('Type', 'Lecture')
-                            classroom = session_data.get('Classroom', 'N/A')
-                            
-                            # Get or create instructor
-                            instructor, _ = Instructor.objects.get_or_create(
-                                name=instructor_name
-                            )
-                            
-                            # Get or create course
-                            course_code = self._extract_course_code(course_name)
-                            course, _ = Course.objects.get_or_create(
-                                code=course_code,
-                                defaults={'name': course_name}
-                            )
-                            
-                            # Create timetable entry
-                            entry, created = TimetableEntry.objects.get_or_create(
-                                cohort=cohort,
-                                section=section,
-                                instructor=instructor,
-                                course=course,
-                                session=day,
-                                time_interval=time_interval,
-                                defaults={
-                                    'type': session_type,
-                                    'classroom': classroom
-                                }
-                            )
-                            
-                            if created:
-                                total_entries += 1
-                                self.stdout.write(
-                                    self.style.SUCCESS(
-                                        f'  [+] Created: {cohort_name} {section_letter} - '
-                                        f'{day} {time_interval} - {course_name}'
-                                    )
-                                )
-                        except Exception as e:
-                            self.stdout.write(
-                                self.style.ERROR(
-                                    f'  [-] Error processing session: {str(e)}'
-                                )
-                            )
-        
+
+        self.stdout.write(
+            f'\nFiles: {len(json_files)}, terms: {len({row.term for row in rows})}, '
+            f'sessions read: {len(rows)}\n'
+            f'Created {stats["cohorts_created"]} cohorts, {stats["sections_created"]} sections, '
+            f'{stats["instructors_created"]} instructors, {stats["courses_created"]} courses'
+        )
         self.stdout.write(
             self.style.SUCCESS(
-                f'\nSuccessfully loaded {total_entries} timetable entries!'
+                f'\nSuccessfully loaded {stats["entries_created"]} timetable entries '
+                f'({stats["entries_updated"]} updated, {stats["entries_deleted"]} deleted, '
+                f'{stats["entries_unchanged"]} unchanged)!'
             )
         )
-    
+
     def _extract_course_code(self, course_name):
         """Extract a course code from course name"""
-        # Create a simple code from the first letters of each word
-        words = course_name.split()
-        code = ''.join([word[0].upper() for word in words if word])
-        return code[:20] if code else 'UNKNOWN'
+        return extract_course_code(course_name)
@@ -0,0 +1,57 @@
+"""
+Django management command to split timetable JSON into per-term files
+Usage: python manage.py split_timetable [--json-file PATH] [--output-dir DIR]
+
+Once TIMETABLE_TERMS_DIR exists the API loads terms from it lazily instead
+of reading the single timetable.json (takes effect on restart).
+"""
+import json
+import os
+import tempfile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from timetable.store import TimetableStore, term_filename
+
+
+class Command(BaseCommand):
+    help = 'Split timetable JSON into one file per term for lazy loading'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json-file',
+            type=str,
+            help='Path to JSON file to split (defaults to the single timetable.json)',
+            default=None
+        )
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            help='Directory for per-term files (defaults to TIMETABLE_TERMS_DIR)',
+            default=None
+        )
+
+    def handle(self, *args, **options):
+        json_file = options.get('json_file')
+        store = TimetableStore(paths=[json_file] if json_file else None)
+        if json_file and not os.path.exists(json_file):
+            raise CommandError(f'JSON file not found: {json_file}')
+
+        data = store.get().data
+        if not data:
+            raise CommandError('No timetable data could be loaded')
+
+        output_dir = options.get('output_dir') or settings.TIMETABLE_TERMS_DIR
+        os.makedirs(output_dir, exist_ok=True)
+
+        for term, sections in data.items():
+            path = os.path.join(output_dir, term_filename(term))
+            fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({term: sections}, f, ensure_ascii=False, indent=2)
+            # Replace atomically so a running server never reads a partial file
+            os.replace(tmp_path, path)
+            self.stdout.write(f'  [+] {term} -> {path}')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nSplit {len(data)} terms into {output_dir}')
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.8 on 2026-10-17 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0002_timetableentry_source_hash'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='timetableentry',
+            options={'ordering': ['cohort', 'section', 'session', 'start_minute'], 'verbose_name_plural': 'Timetable Entries'},
+        ),
+        migrations.AddField(
+            model_name='timetableentry',
+            name='end_minute',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='timetableentry',
+            name='start_minute',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(fields=['cohort', 'section', 'session', 'start_minute'], name='timetable_section_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(fields=['instructor', 'session', 'start_minute'], name='timetable_instructor_start_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.8 on 2026-10-17 10:17
+
+from django.db import migrations
+
+from timetable.intervals import parse_time_interval
+
+
+def populate_minutes(apps, schema_editor):
+    """Fill start_minute/end_minute for entries created before the columns existed"""
+    TimetableEntry = apps.get_model('timetable', 'TimetableEntry')
+    entries = []
+    for entry in TimetableEntry.objects.only('id', 'time_interval').iterator():
+        try:
+            entry.start_minute, entry.end_minute = parse_time_interval(entry.time_interval)
+        except ValueError:
+            continue
+        entries.append(entry)
+    TimetableEntry.objects.bulk_update(entries, ['start_minute', 'end_minute'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0003_timetableentry_minutes'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_minutes, migrations.RunPython.noop),
+    ]
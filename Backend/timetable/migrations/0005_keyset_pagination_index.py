@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-17 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0004_populate_timetableentry_minutes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(fields=['session', 'start_minute', 'id'], name='timetable_session_start_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-17 10:44
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0006_timetable_read_models'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='timetableentry',
+            unique_together={('term', 'cohort', 'section', 'instructor', 'session', 'time_interval')},
+        ),
+    ]
@@ -3,6 +3,8 @@ Timetable app models
 """
 from django.db import models
 
+from .intervals import parse_time_interval
+
 
 class Cohort(models.Model):
     """
@@ -101,13 +103,86 @@ class TimetableEntry(models.Model):
     type = models.CharField(max_length=50, choices=TYPE_CHOICES, default='Lecture')
     classroom = models.CharField(max_length=255, default='N/A')
     
+    # time_interval in minutes since midnight, kept in sync on save so SQL can
+    # sort and range-filter (null when time_interval cannot be parsed)
+    start_minute = models.PositiveSmallIntegerField(null=True, blank=True)
+    end_minute = models.PositiveSmallIntegerField(null=True, blank=True)
+    
+    # Source record in the timetable JSON, used by load_timetable to sync
+    # only what changed (blank for entries created before it was tracked)
+    term = models.CharField(max_length=255, blank=True, default='')
+    session_key = models.CharField(max_length=100, blank=True, default='')
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['cohort', 'section', 'session']
+        ordering = ['cohort', 'section', 'session', 'start_minute']
         verbose_name_plural = 'Timetable Entries'
-        unique_together = ['cohort', 'section', 'instructor', 'session', 'time_interval']
+        unique_together = ['term', 'cohort', 'section', 'instructor', 'session', 'time_interval']
+        indexes = [
+            models.Index(fields=['term', 'section'], name='timetable_term_section_idx'),
+            models.Index(
+                fields=['cohort', 'section', 'session', 'start_minute'],
+                name='timetable_section_start_idx'
+            ),
+            models.Index(
+                fields=['instructor', 'session', 'start_minute'],
+                name='timetable_instructor_start_idx'
+            ),
+            # Keyset pagination key of the entries list
+            models.Index(
+                fields=['session', 'start_minute', 'id'],
+                name='timetable_session_start_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.cohort.name} - {self.session} - {self.time_interval}"
+    
+    def update_minutes(self):
+        """Set start_minute/end_minute from time_interval"""
+        try:
+            self.start_minute, self.end_minute = parse_time_interval(self.time_interval)
+        except ValueError:
+            self.start_minute = self.end_minute = None
+    
+    def save(self, *args, **kwargs):
+        self.update_minutes()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'time_interval' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'start_minute', 'end_minute'}
+        super().save(*args, **kwargs)
+
+
+class SectionTimetable(models.Model):
+    """
+    Read model: the legacy student view of one (cohort, section), precomputed
+    Kept up to date by timetable.read_models; never edit it directly.
+    """
+    cohort = models.ForeignKey(Cohort, on_delete=models.CASCADE, related_name='+')
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='+')
+    entries = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['cohort', 'section']
+    
+    def __str__(self):
+        return f"Timetable of section {self.section_id} ({len(self.entries)} entries)"
+
+
+class InstructorTimetable(models.Model):
+    """
+    Read model: the legacy instructor view of one instructor, precomputed
+    Kept up to date by timetable.read_models; never edit it directly.
+    """
+    instructor = models.OneToOneField(
+        Instructor, on_delete=models.CASCADE, primary_key=True, related_name='+'
+    )
+    entries = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Timetable of instructor {self.instructor_id} ({len(self.entries)} entries)"
@@ -0,0 +1,134 @@
+"""
+Classroom occupancy index over the loaded timetable
+Answers free/busy and utilization queries with bisection instead of scans.
+"""
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+from .intervals import parse_time_interval
+
+# Day names accepted by free_rooms, besides any day the timetable itself uses
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Placeholder classroom used for sessions without a room (e.g. office hours)
+NO_CLASSROOM = 'N/A'
+
+
+class ClassroomDay:
+    """
+    Bookings of one classroom on one day
+
+    `starts`/`ends`/`refs` are parallel lists sorted by start minute, and
+    `max_ends[i]` is the latest end among the first i + 1 bookings, which
+    lets a busy check bisect once even when bookings overlap. `merged` is
+    the union of the booked intervals with running booked-minute totals.
+    """
+    def __init__(self, bookings):
+        bookings.sort(key=lambda booking: booking[:2])
+        self.starts = [start for start, _, _ in bookings]
+        self.ends = [end for _, end, _ in bookings]
+        self.refs = [ref for _, _, ref in bookings]
+        self.max_ends = list(accumulate(self.ends, max))
+
+        merged = []
+        for start, end in zip(self.starts, self.ends):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.merged_starts = [start for start, _ in merged]
+        self.merged_ends = [end for _, end in merged]
+        # booked_before[i] = booked minutes in the first i merged intervals
+        self.booked_before = [0] + list(accumulate(end - start for start, end in merged))
+
+    def is_busy(self, start, end):
+        """True if any booking overlaps [start, end)"""
+        i = bisect_left(self.starts, end)
+        return i > 0 and self.max_ends[i - 1] > start
+
+    def overlapping(self, start, end):
+        """Bookings overlapping [start, end), in start order"""
+        i = bisect_left(self.starts, end)
+        if not i or self.max_ends[i - 1] <= start:
+            return []
+        return [self.refs[k] for k in range(i) if self.ends[k] > start]
+
+    def booked_minutes(self, start, end):
+        """Minutes of [start, end) covered by at least one booking"""
+        if end <= start or not self.merged_starts:
+            return 0
+        lo = bisect_right(self.merged_ends, start)
+        hi = bisect_left(self.merged_starts, end)
+        if lo >= hi:
+            return 0
+        total = self.booked_before[hi] - self.booked_before[lo]
+        # Trim the first and last merged interval to the window
+        total -= max(0, start - self.merged_starts[lo])
+        total -= max(0, self.merged_ends[hi - 1] - end)
+        return total
+
+
+class OccupancyIndex:
+    """
+    Per-term, per-day, per-classroom booking index
+
+    Built once per timetable snapshot. Term None aggregates every term.
+    Sessions without a classroom or with an unparseable time are skipped.
+    """
+    def __init__(self, snapshot):
+        bookings = {}
+        self.classrooms = {}
+        for ref in snapshot.sessions:
+            classroom = ref.data.get('Classroom')
+            if not isinstance(classroom, str) or classroom in ('', NO_CLASSROOM):
+                continue
+            try:
+                start, end = parse_time_interval(ref.data.get('Time'))
+            except ValueError:
+                continue
+            for term in (ref.term, None):
+                self.classrooms.setdefault(term, set()).add(classroom)
+                bookings.setdefault((term, ref.day), {}).setdefault(classroom, []).append((start, end, ref))
+
+        self.classrooms = {term: sorted(rooms) for term, rooms in self.classrooms.items()}
+        # Teaching day spanned by the timetable, the default utilization window
+        all_bookings = [b for rooms in bookings.values() for items in rooms.values() for b in items]
+        self.window = (
+            (min(b[0] for b in all_bookings), max(b[1] for b in all_bookings))
+            if all_bookings else None
+        )
+        # Days in document order
+        self.day_names = list(snapshot.by_day)
+        self.days = {
+            key: {classroom: ClassroomDay(items) for classroom, items in rooms.items()}
+            for key, rooms in bookings.items()
+        }
+
+    def classroom_day(self, term, day, classroom):
+        return self.days.get((term, day), {}).get(classroom)
+
+    def check_day(self, day):
+        """Raise ValueError for a day that is not a weekday name"""
+        if day not in WEEKDAYS and day not in self.day_names:
+            raise ValueError(f'day must be one of: {", ".join(WEEKDAYS)}')
+
+    def free_rooms(self, term, day, start, end):
+        """
+        Return (free, busy) classroom name lists for [start, end) on a day
+        Raises ValueError for a day that is not a weekday name.
+        """
+        self.check_day(day)
+        free, busy = [], []
+        rooms = self.days.get((term, day), {})
+        for classroom in self.classrooms.get(term, []):
+            bookings = rooms.get(classroom)
+            if bookings is not None and bookings.is_busy(start, end):
+                busy.append(classroom)
+            else:
+                free.append(classroom)
+        return free, busy
+
+
+def get_occupancy_index(snapshot):
+    """Occupancy index of a snapshot, built on first use"""
+    return snapshot.derived('occupancy', OccupancyIndex)
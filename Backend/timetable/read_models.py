@@ -0,0 +1,196 @@
+"""
+Materialized read models for the legacy ORM timetable views
+
+The student view of each (cohort, section) and the instructor view of each
+instructor are stored as ready-to-serve documents (SectionTimetable and
+InstructorTimetable), so those endpoints are one indexed row lookup instead
+of a joined query plus per-row serialization.
+
+Signals mark the documents a write affects and rebuild them once the
+transaction commits; a missing document (e.g. data loaded before this
+existed) is built on first read. Rebuilding always reads the current
+database state, so rebuilding a document twice is harmless.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.transactions import OnCommitBatch
+from .models import (
+    Cohort, Section, Instructor, Course, TimetableEntry,
+    SectionTimetable, InstructorTimetable
+)
+from .serializers import TimetableStudentViewSerializer, TimetableInstructorViewSerializer
+
+# Same order the legacy views return (their default ordering, plus id for ties)
+DOCUMENT_ORDERING = ['session', 'start_minute', 'id']
+
+
+def _section_documents(keys):
+    """{(cohort_id, section_id): serialized entries} for `keys`"""
+    entries = TimetableEntry.objects.filter(
+        section_id__in={section_id for _, section_id in keys}
+    ).select_related('instructor', 'course').order_by(*DOCUMENT_ORDERING)
+    grouped = {key: [] for key in keys}
+    for entry in entries:
+        key = (entry.cohort_id, entry.section_id)
+        if key in grouped:
+            grouped[key].append(entry)
+    return {
+        key: TimetableStudentViewSerializer(items, many=True).data
+        for key, items in grouped.items()
+    }
+
+
+def _instructor_documents(instructor_ids):
+    """{instructor_id: serialized entries} for `instructor_ids`"""
+    grouped = {instructor_id: [] for instructor_id in instructor_ids}
+    entries = TimetableEntry.objects.filter(
+        instructor_id__in=instructor_ids
+    ).select_related('cohort', 'section', 'course').order_by(*DOCUMENT_ORDERING)
+    for entry in entries:
+        grouped[entry.instructor_id].append(entry)
+    return {
+        instructor_id: TimetableInstructorViewSerializer(items, many=True).data
+        for instructor_id, items in grouped.items()
+    }
+
+
+def rebuild_section_documents(keys, overwrite=True):
+    """Rebuild the SectionTimetable of each (cohort_id, section_id) in `keys`"""
+    keys = set(keys)
+    if not keys:
+        return {}
+    documents = _section_documents(keys)
+    cohorts = set(Cohort.objects.filter(id__in={c for c, _ in keys}).values_list('id', flat=True))
+    sections = set(Section.objects.filter(id__in={s for _, s in keys}).values_list('id', flat=True))
+    rows = [
+        SectionTimetable(cohort_id=cohort_id, section_id=section_id, entries=entries)
+        for (cohort_id, section_id), entries in documents.items()
+        if cohort_id in cohorts and section_id in sections
+    ]
+    if overwrite:
+        SectionTimetable.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['cohort', 'section'],
+            update_fields=['entries', 'updated_at']
+        )
+    else:
+        SectionTimetable.objects.bulk_create(rows, ignore_conflicts=True)
+    return documents
+
+
+def rebuild_instructor_documents(instructor_ids, overwrite=True):
+    """Rebuild the InstructorTimetable of each id in `instructor_ids`"""
+    instructor_ids = set(instructor_ids)
+    if not instructor_ids:
+        return {}
+    documents = _instructor_documents(instructor_ids)
+    existing = set(Instructor.objects.filter(id__in=instructor_ids).values_list('id', flat=True))
+    rows = [
+        InstructorTimetable(instructor_id=instructor_id, entries=entries)
+        for instructor_id, entries in documents.items()
+        if instructor_id in existing
+    ]
+    if overwrite:
+        InstructorTimetable.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['instructor'],
+            update_fields=['entries', 'updated_at']
+        )
+    else:
+        InstructorTimetable.objects.bulk_create(rows, ignore_conflicts=True)
+    return documents
+
+
+def get_section_document(cohort_id, section_id):
+    """Student view entries of a (cohort, section), building the document if missing"""
+    entries = SectionTimetable.objects.filter(
+        cohort_id=cohort_id, section_id=section_id
+    ).values_list('entries', flat=True).first()
+    if entries is None:
+        # Never overwrite here: a concurrent rebuild has the fresher data
+        key = (int(cohort_id), int(section_id))
+        entries = rebuild_section_documents([key], overwrite=False)[key]
+    return entries
+
+
+def get_instructor_document(instructor_id):
+    """Instructor view entries of an instructor, building the document if missing"""
+    entries = InstructorTimetable.objects.filter(
+        instructor_id=instructor_id
+    ).values_list('entries', flat=True).first()
+    if entries is None:
+        instructor_id = int(instructor_id)
+        entries = rebuild_instructor_documents([instructor_id], overwrite=False)[instructor_id]
+    return entries
+
+
+def mark_dirty(section_keys=(), instructor_ids=()):
+    """
+    Rebuild these documents when the current transaction commits
+    Marks are pooled per thread so a cascade of signals rebuilds each
+    document once.
+    """
+    _rebuilds.mark(sections=section_keys, instructors=instructor_ids)
+
+
+def _rebuild(using, sections=(), instructors=()):
+    rebuild_section_documents(sections)
+    rebuild_instructor_documents(instructors)
+
+
+_rebuilds = OnCommitBatch(_rebuild)
+
+
+def _mark_entries(queryset):
+    """Mark the documents holding any entry of `queryset`"""
+    rows = set(queryset.order_by().values_list('cohort_id', 'section_id', 'instructor_id'))
+    mark_dirty(
+        section_keys={(cohort_id, section_id) for cohort_id, section_id, _ in rows},
+        instructor_ids={instructor_id for _, _, instructor_id in rows},
+    )
+
+
+@receiver(pre_save, sender=TimetableEntry)
+def _remember_entry_owners(sender, instance, raw=False, **kwargs):
+    # A moved entry must also leave its old section and instructor documents
+    instance._read_model_owners = None
+    if instance.pk and not raw:
+        instance._read_model_owners = TimetableEntry.objects.filter(pk=instance.pk).values_list(
+            'cohort_id', 'section_id', 'instructor_id'
+        ).first()
+
+
+@receiver(post_save, sender=TimetableEntry)
+@receiver(post_delete, sender=TimetableEntry)
+def _entry_changed(sender, instance, **kwargs):
+    section_keys = {(instance.cohort_id, instance.section_id)}
+    instructor_ids = {instance.instructor_id}
+    owners = getattr(instance, '_read_model_owners', None)
+    if owners:
+        section_keys.add(owners[:2])
+        instructor_ids.add(owners[2])
+    mark_dirty(section_keys, instructor_ids)
+
+
+@receiver(post_save, sender=Course)
+def _course_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        _mark_entries(TimetableEntry.objects.filter(course_id=instance.pk))
+
+
+@receiver(post_save, sender=Instructor)
+def _instructor_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        _mark_entries(TimetableEntry.objects.filter(instructor_id=instance.pk))
+
+
+@receiver(post_save, sender=Cohort)
+def _cohort_changed(sender, instance, created=False, **kwargs):
+    # Cohort and section names appear in the instructor view
+    if not created:
+        _mark_entries(TimetableEntry.objects.filter(cohort_id=instance.pk))
+
+
+@receiver(post_save, sender=Section)
+def _section_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        _mark_entries(TimetableEntry.objects.filter(section_id=instance.pk))
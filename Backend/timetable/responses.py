@@ -0,0 +1,135 @@
+"""
+Cached, conditional responses for the JSON timetable endpoints
+"""
+import hashlib
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_header_parameters
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+# Bodies smaller than this are not worth the gzip header overhead
+GZIP_MIN_LENGTH = 200
+
+
+class RenderedPayload:
+    """
+    Rendered response body for one (endpoint, params) of one timetable version
+
+    The gzip variant is compressed at most once and kept next to the raw
+    bytes, so compression cost is paid per version rather than per request.
+    `gzip_body` stays None when compressing would not make the body smaller.
+    """
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self._gzip_body = None
+        self._gzip_done = False
+
+    @property
+    def gzip_body(self):
+        if not self._gzip_done:
+            if len(self.body) >= GZIP_MIN_LENGTH:
+                compressed = compress_string(self.body)
+                if len(compressed) < len(self.body):
+                    self._gzip_body = compressed
+            self._gzip_done = True
+        return self._gzip_body
+
+
+def accepts_gzip(request):
+    """True if the Accept-Encoding header allows gzip (q=0 counts as refused)"""
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _normalized_media_type(request, renderer):
+    """
+    Media type a JSON payload is rendered and cached for
+    Only `indent` changes the body, so every other Accept parameter is
+    dropped; otherwise each distinct parameter would get its own copy.
+    """
+    _, params = parse_header_parameters(request.accepted_media_type or '')
+    try:
+        indent = max(min(int(params['indent']), 8), 0)
+    except (KeyError, ValueError, TypeError):
+        return renderer.media_type
+    return f'{renderer.media_type}; indent={indent}'
+
+
+def _make_etag(snapshot, key, media_type):
+    """Strong ETag derived from the timetable content hash and the resource key"""
+    digest = hashlib.sha256(
+        f'{snapshot.content_hash}|{media_type}|{key!r}'.encode('utf-8')
+    ).hexdigest()
+    return f'"{digest[:40]}"'
+
+
+def cached_timetable_response(request, snapshot, key, build_data):
+    """
+    Serve a timetable payload rendered once per timetable version
+
+    `key` identifies the resource, e.g. ('by_section', term, section), and
+    `build_data` returns the payload when it has not been rendered yet.
+    Conditional requests matching the ETag / Last-Modified get a 304 without
+    building or rendering anything. Clients accepting gzip get the
+    precompressed body, with its own ETag. Non-JSON renderers (browsable
+    API) fall back to a regular DRF response.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    if not isinstance(renderer, JSONRenderer) or snapshot.content_hash is None:
+        return Response(build_data())
+
+    media_type = _normalized_media_type(request, renderer)
+    cache_key = (key, media_type)
+    payload = snapshot.rendered.get(cache_key)
+    # Unrendered payloads are assumed compressible; 304s never need the body
+    use_gzip = accepts_gzip(request) and (payload is None or payload.gzip_body is not None)
+
+    etag = _make_etag(snapshot, key, media_type)
+    if use_gzip:
+        etag = f'{etag[:-1]}-gzip"'
+    last_modified = int(snapshot.last_modified)
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if not_modified is not None:
+        if not_modified.status_code == 304:
+            not_modified['ETag'] = etag
+            not_modified['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(not_modified, ('Accept-Encoding',))
+        return not_modified
+
+    if payload is None:
+        body = renderer.render(build_data(), media_type, {})
+        payload = RenderedPayload(body, renderer.media_type)
+        snapshot.rendered[cache_key] = payload
+
+    if use_gzip and payload.gzip_body is None:
+        # Turned out not to compress; serve the identity encoding instead
+        use_gzip = False
+        etag = _make_etag(snapshot, key, media_type)
+
+    body = payload.gzip_body if use_gzip else payload.body
+    response = HttpResponse(body, content_type=payload.content_type)
+    if use_gzip:
+        response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
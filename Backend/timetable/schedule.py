@@ -0,0 +1,55 @@
+"""
+Per-day session arrays sorted by start minute
+Used to answer "what is on now" and "what is next" with bisection.
+"""
+from bisect import bisect_right
+
+from .intervals import parse_time_interval
+
+
+class DaySchedule:
+    """
+    Sessions of one day as parallel arrays sorted by start minute
+
+    `max_duration` bounds how far back a session still running at a given
+    minute can have started, so "now" only inspects that slice.
+    """
+    def __init__(self, bookings):
+        bookings.sort(key=lambda booking: booking[:2])
+        self.starts = [start for start, _, _ in bookings]
+        self.ends = [end for _, end, _ in bookings]
+        self.refs = [ref for _, _, ref in bookings]
+        self.max_duration = max((end - start for start, end, _ in bookings), default=0)
+
+    def current(self, minute):
+        """Sessions running at `minute` (start <= minute < end)"""
+        lo = bisect_right(self.starts, minute - self.max_duration)
+        hi = bisect_right(self.starts, minute)
+        return [self.refs[i] for i in range(lo, hi) if self.ends[i] > minute]
+
+    def upcoming(self, minute):
+        """(start, sessions) for the earliest start strictly after `minute`"""
+        i = bisect_right(self.starts, minute)
+        if i == len(self.starts):
+            return None, []
+        start = self.starts[i]
+        j = bisect_right(self.starts, start, lo=i)
+        return start, self.refs[i:j]
+
+
+def build_day_schedules(sessions):
+    """
+    Build {(term, day): DaySchedule} from SessionRefs
+
+    Term None aggregates every term. Sessions with an unparseable time are
+    left out.
+    """
+    bookings = {}
+    for ref in sessions:
+        try:
+            start, end = parse_time_interval(ref.data.get('Time'))
+        except ValueError:
+            continue
+        for term in (ref.term, None):
+            bookings.setdefault((term, ref.day), []).append((start, end, ref))
+    return {key: DaySchedule(items) for key, items in bookings.items()}
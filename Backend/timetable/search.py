@@ -0,0 +1,118 @@
+"""
+Typo-tolerant search over instructor, course and classroom names
+Names are normalized (case and diacritics folded) and indexed by trigram and
+by word prefix once per timetable snapshot; queries only touch the posting
+lists of their own trigrams.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+
+# (kind, session field, snapshot index attribute)
+SEARCH_KINDS = (
+    ('instructor', 'Instructor', 'by_instructor'),
+    ('course', 'Course', 'by_course'),
+    ('classroom', 'Classroom', 'by_classroom'),
+)
+
+# Trigram similarity below this is treated as noise
+MIN_SIMILARITY = 0.3
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(value):
+    """Fold case and diacritics and collapse punctuation: "Dieudonné, U." -> "dieudonne u" """
+    decomposed = unicodedata.normalize('NFKD', value)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(' ', stripped.casefold()).strip()
+
+
+def trigrams(normalized):
+    """Set of trigrams of a normalized string, padded so short words still match"""
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Trigram and word-prefix index over the distinct names of a snapshot
+
+    Scores are Dice coefficients over trigrams, raised to at least 0.9 for a
+    prefix of a word in the name and to 1.0 for a prefix of the whole name.
+    """
+    def __init__(self, snapshot):
+        self.entries = []        # (kind, name, session count)
+        self.postings = {}       # trigram -> [entry ids]
+        self.gram_counts = []    # entry id -> number of trigrams
+        self.full_names = []     # sorted (normalized name, entry id)
+        self.words = []          # sorted (normalized word, entry id)
+
+        for kind, _, attribute in SEARCH_KINDS:
+            for name, refs in getattr(snapshot, attribute).items():
+                normalized = normalize(name)
+                if not normalized:
+                    continue
+                entry_id = len(self.entries)
+                self.entries.append((kind, name, len(refs)))
+                grams = trigrams(normalized)
+                self.gram_counts.append(len(grams))
+                for gram in grams:
+                    self.postings.setdefault(gram, []).append(entry_id)
+                self.full_names.append((normalized, entry_id))
+                self.words.extend((word, entry_id) for word in normalized.split())
+
+        self.full_names.sort()
+        self.words.sort()
+
+    @staticmethod
+    def _prefix_matches(sorted_pairs, prefix):
+        """Entry ids whose key starts with prefix, via bisection"""
+        i = bisect_left(sorted_pairs, (prefix,))
+        while i < len(sorted_pairs) and sorted_pairs[i][0].startswith(prefix):
+            yield sorted_pairs[i][1]
+            i += 1
+
+    def search(self, query, kind=None, limit=10):
+        """Return up to `limit` ranked matches as dicts"""
+        normalized = normalize(query)
+        if not normalized:
+            return []
+
+        query_grams = trigrams(normalized)
+        shared = {}
+        for gram in query_grams:
+            for entry_id in self.postings.get(gram, ()):
+                shared[entry_id] = shared.get(entry_id, 0) + 1
+        scores = {
+            entry_id: 2 * count / (len(query_grams) + self.gram_counts[entry_id])
+            for entry_id, count in shared.items()
+        }
+
+        for entry_id in self._prefix_matches(self.words, normalized):
+            scores[entry_id] = max(scores.get(entry_id, 0), 0.9)
+        for entry_id in self._prefix_matches(self.full_names, normalized):
+            scores[entry_id] = 1.0
+
+        ranked = sorted(
+            (
+                (-score, self.entries[entry_id][1], entry_id)
+                for entry_id, score in scores.items()
+                if score >= MIN_SIMILARITY and (kind is None or self.entries[entry_id][0] == kind)
+            )
+        )
+        results = []
+        for negative_score, name, entry_id in ranked[:limit]:
+            entry_kind, _, sessions = self.entries[entry_id]
+            results.append({
+                'kind': entry_kind,
+                'name': name,
+                'score': round(-negative_score, 3),
+                'sessions': sessions,
+            })
+        return results
+
+
+def get_search_index(snapshot):
+    """Search index of a snapshot, rebuilt only when the timetable changes"""
+    return snapshot.derived('search', SearchIndex)
@@ -21,6 +21,7 @@ class SectionSerializer(serializers.ModelSerializer):
         model = Section
         fields = ['id', 'name', 'cohort', 'cohort_name', 'created_at']
         read_only_fields = ['id', 'created_at']
+        expandable_fields = {'cohort': CohortSerializer}
 
 
 class InstructorSerializer(serializers.ModelSerializer):
@@ -56,6 +57,13 @@ class TimetableEntrySerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        # ?expand= nests these instead of returning their ids
+        expandable_fields = {
+            'cohort': CohortSerializer,
+            'section': SectionSerializer,
+            'instructor': InstructorSerializer,
+            'course': CourseSerializer,
+        }
 
 
 class TimetableStudentViewSerializer(serializers.ModelSerializer):
@@ -0,0 +1,422 @@
+"""
+Process-wide timetable store
+Parses timetable.json once and re-parses only when the file changes on disk
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import quote, unquote
+
+from django.conf import settings
+
+from .schedule import build_day_schedules
+
+logger = logging.getLogger(__name__)
+
+
+def get_default_timetable_paths():
+    """Candidate timetable JSON locations, in lookup order"""
+    return [
+        # Backend/timetable/timetable.json
+        os.path.join(settings.BASE_DIR, 'timetable', 'timetable.json'),
+        # Fallback to Backend directory root
+        os.path.join(settings.BASE_DIR, 'timetable.json'),
+    ]
+
+
+# One session of the timetable, located by its position in the JSON document
+SessionRef = namedtuple('SessionRef', ['term', 'section', 'day', 'session', 'data'])
+
+
+def describe_session(ref):
+    """Flat dict describing one session, used in API responses"""
+    return {
+        'term': ref.term,
+        'section': ref.section,
+        'day': ref.day,
+        'session': ref.session,
+        'course': ref.data.get('Course'),
+        'instructor': ref.data.get('Instructor'),
+        'classroom': ref.data.get('Classroom'),
+        'type': ref.data.get('Type'),
+        'time': ref.data.get('Time'),
+    }
+
+
+def validate_timetable(data):
+    """
+    Check the {term: {section: {day: {session: {...}}}}} nesting
+    Raises ValueError describing the first misplaced value.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('timetable root must be a JSON object')
+    for term, sections in data.items():
+        if not isinstance(sections, dict):
+            raise ValueError(f'Term "{term}" is not an object')
+        for section, days in sections.items():
+            if not isinstance(days, dict):
+                raise ValueError(f'Section "{section}" is not an object')
+            for day, sessions in days.items():
+                if not isinstance(sessions, dict):
+                    raise ValueError(f'Day "{day}" of "{section}" is not an object')
+                for session_key, session_data in sessions.items():
+                    if not isinstance(session_data, dict):
+                        raise ValueError(f'Session "{session_key}" of "{section}" is not an object')
+
+
+def iter_sessions(data):
+    """Yield a SessionRef for every session, in document order"""
+    for term, sections in data.items():
+        if not isinstance(sections, dict):
+            continue
+        for section, days in sections.items():
+            if not isinstance(days, dict):
+                continue
+            for day, sessions in days.items():
+                if not isinstance(sessions, dict):
+                    continue
+                for session_key, session_data in sessions.items():
+                    if isinstance(session_data, dict):
+                        yield SessionRef(term, section, day, session_key, session_data)
+
+
+class TimetableSnapshot:
+    """
+    Immutable view of one version of the timetable file
+
+    The parsed data is shared by every request that sees this snapshot,
+    so callers must treat it as read-only. Inverted indexes from instructor,
+    classroom, course and day to the matching sessions are built once here
+    so lookups cost O(result) instead of a scan over every session.
+
+    `content_hash` identifies the version for HTTP validators, and `rendered`
+    holds response bodies cached against this version by the views.
+    """
+    def __init__(self, data, path=None, signature=None, content_hash=None):
+        self.data = data
+        self.path = path
+        self.signature = signature
+        self.content_hash = content_hash
+        self.loaded_at = time.time()
+        # File mtime in seconds, used for Last-Modified
+        self.last_modified = signature[2] / 1e9 if signature else self.loaded_at
+        self.rendered = {}
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+        self.by_instructor = {}
+        self.by_classroom = {}
+        self.by_course = {}
+        self.by_day = {}
+        # Flat (term, section) order, used to page through the timetable
+        self.section_keys = [
+            (term, section)
+            for term, sections in data.items() if isinstance(sections, dict)
+            for section in sections
+        ]
+        self.sessions = list(iter_sessions(data))
+        for ref in self.sessions:
+            self.by_day.setdefault(ref.day, []).append(ref)
+            for index, field in (
+                (self.by_instructor, 'Instructor'),
+                (self.by_classroom, 'Classroom'),
+                (self.by_course, 'Course'),
+            ):
+                value = ref.data.get(field)
+                if isinstance(value, str):
+                    index.setdefault(value, []).append(ref)
+        # Per (term, day) arrays sorted by start minute, for now/next lookups
+        self.day_schedules = build_day_schedules(self.sessions)
+
+    def __bool__(self):
+        return bool(self.data)
+
+    def derived(self, name, factory):
+        """
+        Return a structure computed from this snapshot, building it once
+
+        `factory(snapshot)` runs at most once per snapshot, so anything built
+        here is automatically recomputed when the timetable changes.
+        """
+        value = self._derived.get(name)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = self._derived[name] = factory(self)
+        return value
+
+    def sessions_for_instructor(self, name):
+        return self.by_instructor.get(name, [])
+
+    def sessions_for_classroom(self, name):
+        return self.by_classroom.get(name, [])
+
+    def sessions_for_course(self, name):
+        return self.by_course.get(name, [])
+
+    def sessions_for_day(self, day):
+        return self.by_day.get(day, [])
+
+    def day_schedule(self, term, day):
+        """DaySchedule for a day, across all terms when term is None"""
+        return self.day_schedules.get((term, day))
+
+
+class TimetableStore:
+    """
+    Holds the parsed timetable for the whole process
+
+    Each get() costs a single os.stat(); the file is only parsed again when
+    its (inode, size, mtime) signature changes. A new snapshot is fully built
+    before it replaces the current one, so concurrent readers always see
+    either the old or the new version, never a partial one.
+    """
+    def __init__(self, paths=None):
+        self._paths = paths
+        self._lock = threading.Lock()
+        self._snapshot = TimetableSnapshot({})
+        self._failed_signature = None
+        self._loaded = False
+        # Set while a TimetableWatcher keeps this store fresh; get() then
+        # serves the published snapshot without touching the filesystem
+        self.watched = False
+
+    @property
+    def paths(self):
+        return self._paths if self._paths is not None else get_default_timetable_paths()
+
+    def _stat(self):
+        """Return (path, signature) of the first existing candidate file"""
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return path, (st.st_ino, st.st_size, st.st_mtime_ns)
+        return None, None
+
+    def _is_current(self, snapshot, path, signature):
+        return snapshot.path == path and snapshot.signature == signature
+
+    def get(self):
+        """Return the current snapshot, reloading it if the file changed"""
+        if self.watched and self._loaded:
+            return self._snapshot
+        return self.refresh()
+
+    def refresh(self, prepare=None):
+        """
+        Reload the file if it changed and return the current snapshot
+
+        `prepare(snapshot)` runs on a freshly loaded snapshot before it is
+        published, so derived indexes can be built off the request path.
+        """
+        path, signature = self._stat()
+        snapshot = self._snapshot
+        if self._loaded and self._is_current(snapshot, path, signature):
+            return snapshot
+        if (path, signature) == self._failed_signature:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            snapshot = self._snapshot
+            if self._loaded and self._is_current(snapshot, path, signature):
+                return snapshot
+            self._loaded = True
+
+            if path is None:
+                logger.warning("Timetable JSON file not found")
+                snapshot = TimetableSnapshot({})
+            else:
+                try:
+                    snapshot = self._load(path, signature)
+                    if prepare is not None:
+                        prepare(snapshot)
+                except Exception as e:
+                    # Keep serving the last good version until the file is fixed
+                    logger.error(f"Error loading timetable JSON: {str(e)}")
+                    self._failed_signature = (path, signature)
+                    return self._snapshot
+
+            self._failed_signature = None
+            self._snapshot = snapshot
+            return snapshot
+
+    def _load(self, path, signature):
+        """Parse the file into a new snapshot"""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        content_hash = hashlib.sha256(raw).hexdigest()
+        data = json.loads(raw)
+        validate_timetable(data)
+        logger.info(f"Loaded timetable from {path}")
+        return TimetableSnapshot(
+            data, path=path, signature=signature, content_hash=content_hash
+        )
+
+    @property
+    def loaded_bytes(self):
+        """Size of the source file behind the current snapshot"""
+        signature = self._snapshot.signature
+        return signature[1] if signature else 0
+
+    def get_term(self, term):
+        """Snapshot holding `term`; a single file always holds every term"""
+        return self.get()
+
+    def clear(self):
+        """Drop the cached snapshot so the next get() re-reads the file"""
+        with self._lock:
+            self._snapshot = TimetableSnapshot({})
+            self._failed_signature = None
+            self._loaded = False
+
+
+def term_filename(term):
+    """Per-term file name; term names contain '/' so they are percent-encoded"""
+    return quote(term, safe='') + '.json'
+
+
+class PartitionedTimetableStore:
+    """
+    Timetable split into one JSON file per term, loaded lazily
+
+    Each file has the same shape as timetable.json with a single term and
+    is named by term_filename(). Terms are parsed on first access and kept
+    in an LRU capped at `max_bytes` of source JSON, so by_term/by_section
+    for the current term never pay for historical or future terms. get()
+    still assembles every term for the whole-timetable endpoints and keeps
+    that combined snapshot until a per-term lookup needs the room, at which
+    point it is dropped and rebuilt on the next get().
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._partitions = OrderedDict()  # term -> TimetableStore, least recent first
+        self._combined = TimetableSnapshot({})
+        self._combined_key = None
+        self.watched = False
+
+    def terms(self):
+        """Term names available on disk, in file name order"""
+        try:
+            names = sorted(
+                entry.name for entry in os.scandir(self.directory)
+                if entry.name.endswith('.json') and entry.is_file()
+            )
+        except OSError:
+            return []
+        return [unquote(name[:-len('.json')]) for name in names]
+
+    def _partition(self, term):
+        """TimetableStore for one term, marking it most recently used"""
+        with self._lock:
+            store = self._partitions.get(term)
+            if store is None:
+                store = TimetableStore(paths=[os.path.join(self.directory, term_filename(term))])
+                store.watched = self.watched
+                self._partitions[term] = store
+            self._partitions.move_to_end(term)
+        return store
+
+    def _evict(self, keep):
+        """
+        Drop least recently used terms outside `keep` until resident JSON fits max_bytes
+        The combined snapshot references every term it holds, so unless all
+        of them are kept it is dropped first and rebuilt by the next get().
+        """
+        with self._lock:
+            resident = sum(store.loaded_bytes for store in self._partitions.values())
+            if resident <= self.max_bytes:
+                return
+            combined_terms = {term for term, _ in self._combined_key or ()}
+            if not combined_terms <= keep:
+                self._combined, self._combined_key = TimetableSnapshot({}), None
+            for term in list(self._partitions):
+                if resident <= self.max_bytes:
+                    break
+                if term in keep:
+                    continue
+                resident -= self._partitions.pop(term).loaded_bytes
+                logger.info(f"Evicted timetable term {term} from memory")
+
+    def get_term(self, term):
+        """Snapshot holding only `term`, or an empty one if it does not exist"""
+        if not os.path.isfile(os.path.join(self.directory, term_filename(term))):
+            return TimetableSnapshot({})
+        snapshot = self._partition(term).get()
+        self._evict(keep={term})
+        return snapshot
+
+    def get(self):
+        """Snapshot of every term, rebuilt when any term file changes"""
+        if self.watched and self._combined_key is not None:
+            return self._combined
+        return self._combine()
+
+    def _combine(self, prepare=None):
+        parts = []
+        for term in self.terms():
+            snapshot = self._partition(term).get()
+            if term in snapshot.data:
+                parts.append((term, snapshot))
+        key = tuple((term, snapshot.content_hash) for term, snapshot in parts)
+
+        if key != self._combined_key:
+            content_hash = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+            latest = max((snapshot.signature for _, snapshot in parts), key=lambda sig: sig[2], default=None)
+            combined = TimetableSnapshot(
+                {term: snapshot.data[term] for term, snapshot in parts},
+                path=self.directory, signature=latest, content_hash=content_hash if parts else None
+            )
+            if prepare is not None:
+                prepare(combined)
+            # Publish snapshot and key together
+            with self._lock:
+                self._combined, self._combined_key = combined, key
+        combined = self._combined
+        self._evict(keep={term for term, _ in parts})
+        return combined
+
+    def refresh(self, prepare=None):
+        """
+        Reload changed terms that are already resident
+
+        Terms nobody asked for stay unloaded; the combined snapshot is only
+        rebuilt if it has been requested before.
+        """
+        with self._lock:
+            stores = list(self._partitions.values())
+        for store in stores:
+            store.refresh(prepare)
+        if self._combined_key is not None:
+            return self._combine(prepare)
+        return self._combined
+
+    def clear(self):
+        """Forget every loaded term"""
+        with self._lock:
+            self._partitions.clear()
+            self._combined = TimetableSnapshot({})
+            self._combined_key = None
+
+
+def _create_default_store():
+    """
+    Per-term partitions when TIMETABLE_TERMS_DIR exists, else the single file
+    The mode is chosen once at startup.
+    """
+    directory = getattr(settings, 'TIMETABLE_TERMS_DIR', None)
+    if directory and os.path.isdir(directory):
+        return PartitionedTimetableStore(directory, settings.TIMETABLE_TERM_CACHE_BYTES)
+    return TimetableStore()
+
+
+timetable_store = _create_default_store()
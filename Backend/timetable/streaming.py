@@ -0,0 +1,80 @@
+"""
+Incremental and paged delivery of the full timetable
+"""
+import base64
+import json
+
+from rest_framework.exceptions import NotFound
+from rest_framework.utils import encoders
+
+
+def encode_json(obj):
+    """Encode a value exactly like DRF's JSONRenderer (compact, UTF-8)"""
+    ret = json.dumps(
+        obj, cls=encoders.JSONEncoder, ensure_ascii=False,
+        allow_nan=False, separators=(',', ':')
+    )
+    # Same escaping JSONRenderer applies for JavaScript compatibility
+    ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return ret.encode('utf-8')
+
+
+def iter_timetable_json(data):
+    """
+    Yield the timetable as JSON, one section at a time
+
+    The concatenated chunks are byte-identical to rendering the whole
+    document at once, but only one section is ever encoded in memory.
+    """
+    yield b'{'
+    for i, (term, sections) in enumerate(data.items()):
+        prefix = b',' if i else b''
+        if not isinstance(sections, dict):
+            yield prefix + encode_json(term) + b':' + encode_json(sections)
+            continue
+        yield prefix + encode_json(term) + b':{'
+        for j, (section, days) in enumerate(sections.items()):
+            yield (b',' if j else b'') + encode_json(section) + b':' + encode_json(days)
+        yield b'}'
+    yield b'}'
+
+
+def encode_cursor(snapshot, offset):
+    """Opaque cursor pointing at a section offset within one timetable version"""
+    raw = f'{snapshot.content_hash[:16]}:{offset}'.encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(snapshot, cursor, section_count):
+    """
+    Return the section offset stored in a cursor
+
+    Raises ValueError for malformed cursors and for cursors issued against
+    a different timetable version, since offsets would no longer line up,
+    and NotFound for offsets past the last of `section_count` sections,
+    which no issued cursor points at.
+    """
+    try:
+        version, _, offset = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').partition(':')
+        offset = int(offset)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if version != snapshot.content_hash[:16]:
+        raise ValueError('Timetable has changed, restart from the first page')
+    if offset < 0:
+        raise ValueError('Invalid cursor')
+    if offset >= section_count:
+        raise NotFound('Invalid cursor')
+    return offset
+
+
+def build_section_page(snapshot, offset, page_size):
+    """Return ({term: {section: days}}, next_offset or None) for one page"""
+    keys = snapshot.section_keys[offset:offset + page_size]
+    results = {}
+    for term, section in keys:
+        results.setdefault(term, {})[section] = snapshot.data[term][section]
+    next_offset = offset + page_size
+    if next_offset >= len(snapshot.section_keys):
+        next_offset = None
+    return results, next_offset
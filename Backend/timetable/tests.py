@@ -1,9 +1,34 @@
 """
 Timetable tests
 """
-from django.test import TestCase
+import base64
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
-from .models import Cohort, Section, Instructor, Course, TimetableEntry
+from core.pagination import KeysetPagination
+from core.serializers import get_values_plan
+from .models import Cohort, Section, Instructor, Course, TimetableEntry, SectionTimetable
+from .conflicts import find_conflicts, get_conflicts
+from .intervals import parse_time_interval
+from .occupancy import get_occupancy_index
+from .search import get_search_index, normalize
+from .serializers import CohortSerializer, CourseSerializer, TimetableEntrySerializer
+from .store import (
+    PartitionedTimetableStore, TimetableSnapshot, TimetableStore, term_filename, timetable_store
+)
+from .streaming import encode_cursor
+from .views import load_timetable_json
+from .watcher import TimetableWatcher, prepare_snapshot, should_watch
 
 
 class TimetableAPITests(TestCase):
@@ -29,9 +54,721 @@ class TimetableAPITests(TestCase):
         response = self.client.get(f'/api/v1/sections/?cohort_id={self.cohort.id}')
         self.assertEqual(response.status_code, 200)
     
+    def test_sections_fields_and_expand(self):
+        """Test sections join their cohort and honour ?fields= and ?expand="""
+        for name in ('Section B', 'Section C'):
+            Section.objects.create(name=name, cohort=Cohort.objects.create(name=f'Cohort {name}'))
+        # One COUNT and one SELECT, however many cohorts
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/sections/?ordering=name')
+        self.assertEqual(response.data['results'][0]['cohort_name'], 'Test Cohort 2024')
+
+        response = self.client.get('/api/v1/sections/?fields=id,name')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name'])
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/sections/?ordering=name&fields=name&expand=cohort')
+        self.assertEqual(response.data['results'][0], {
+            'name': 'Section A', 'cohort': CohortSerializer(self.cohort).data
+        })
+
+        response = self.client.get('/api/v1/sections/?fields=name,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+        response = self.client.get('/api/v1/sections/?expand=name')
+        self.assertEqual(response.status_code, 400)
+
+    def test_entries_sparse_fieldsets(self):
+        """Test entry pages with ?fields= and ?expand= keep paging in bounded queries"""
+        for time_interval in ('14:00-16:00', '9:00-10:00', '10:30-12:30', '8:00-9:00'):
+            TimetableEntry.objects.create(
+                cohort=self.cohort, section=self.section, instructor=self.instructor,
+                course=self.course, session='Monday', time_interval=time_interval
+            )
+        response = self.client.get('/api/v1/timetable/entries/?fields=id,course_code')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'course_code'])
+        self.assertEqual(response.data['results'][0]['course_code'], 'TEST101')
+
+        seen = []
+        url = '/api/v1/timetable/entries/?fields=id,time_interval&expand=course,section'
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            while url:
+                with self.assertNumQueries(1):
+                    response = self.client.get(url)
+                seen.extend(entry['time_interval'] for entry in response.data['results'])
+                url = response.data['next']
+        self.assertEqual(seen, ['8:00-9:00', '9:00-10:00', '10:30-12:30', '14:00-16:00'])
+        self.assertEqual(response.data['results'][0]['course'], CourseSerializer(self.course).data)
+        self.assertEqual(response.data['results'][0]['section']['cohort_name'], 'Test Cohort 2024')
+
     def test_student_timetable_view(self):
         """Test student timetable endpoint"""
         response = self.client.get(
             f'/api/v1/timetable/student/?cohort_id={self.cohort.id}&section_id={self.section.id}'
         )
         self.assertEqual(response.status_code, 200)
+
+    def test_student_timetable_time_filters(self):
+        """Test legacy entries are ordered and filtered by start/end minute"""
+        for time_interval in ('14:00-16:00', '9:00-10:00', '10:30-12:30'):
+            TimetableEntry.objects.create(
+                cohort=self.cohort, section=self.section, instructor=self.instructor,
+                course=self.course, session='Monday', time_interval=time_interval
+            )
+        self.assertEqual(
+            TimetableEntry.objects.get(time_interval='10:30-12:30').start_minute, 630
+        )
+        url = f'/api/v1/timetable/student/?cohort_id={self.cohort.id}&section_id={self.section.id}'
+        response = self.client.get(url)
+        self.assertEqual(
+            [entry['time_interval'] for entry in response.data],
+            ['9:00-10:00', '10:30-12:30', '14:00-16:00']
+        )
+        response = self.client.get(url + '&start_after=9:30&end_before=13:00')
+        self.assertEqual([entry['time_interval'] for entry in response.data], ['10:30-12:30'])
+        response = self.client.get(url + '&start_after=soon')
+        self.assertEqual(response.status_code, 400)
+
+    def test_legacy_views_served_from_read_model(self):
+        """Test legacy student/instructor views come from documents kept fresh by signals"""
+        with self.captureOnCommitCallbacks(execute=True):
+            for time_interval in ('14:00-16:00', '9:00-10:00'):
+                TimetableEntry.objects.create(
+                    cohort=self.cohort, section=self.section, instructor=self.instructor,
+                    course=self.course, session='Monday', time_interval=time_interval
+                )
+        student_url = f'/api/v1/timetable/student/?cohort_id={self.cohort.id}&section_id={self.section.id}'
+        instructor_url = f'/api/v1/timetable/instructor/?instructor_id={self.instructor.id}'
+        with self.assertNumQueries(1):
+            response = self.client.get(student_url)
+        self.assertEqual(response.data, self.client.get(student_url + '&ordering=session,start_minute').data)
+        with self.assertNumQueries(1):
+            response = self.client.get(instructor_url)
+        self.assertEqual([entry['time_interval'] for entry in response.data], ['9:00-10:00', '14:00-16:00'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.name = 'Renamed Course'
+            self.course.save()
+        self.assertEqual(self.client.get(student_url).data[0]['course_name'], 'Renamed Course')
+        self.assertEqual(self.client.get(instructor_url).data[0]['course_name'], 'Renamed Course')
+
+        other = Instructor.objects.create(name='Dr. Other')
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = TimetableEntry.objects.get(time_interval='9:00-10:00')
+            entry.instructor = other
+            entry.save()
+        self.assertEqual(len(self.client.get(instructor_url).data), 1)
+        self.assertEqual(self.client.get(student_url).data[0]['instructor_name'], 'Dr. Other')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TimetableEntry.objects.all().delete()
+        self.assertEqual(self.client.get(student_url).data, [])
+        self.assertEqual(SectionTimetable.objects.get(section=self.section).entries, [])
+
+    def test_entries_values_serialization_matches_serializer(self):
+        """Test the .values() fast path of the entries list renders like the serializer"""
+        for time_interval in ('14:00-16:00', '9:00-10:00'):
+            TimetableEntry.objects.create(
+                cohort=self.cohort, section=self.section, instructor=self.instructor,
+                course=self.course, session='Friday', time_interval=time_interval, type='Lab'
+            )
+        self.assertIsNotNone(get_values_plan(TimetableEntrySerializer))
+        response = self.client.get('/api/v1/timetable/entries/')
+        queryset = TimetableEntry.objects.order_by('session', 'start_minute', 'id')
+        self.assertEqual(
+            JSONRenderer().render(response.data['results']),
+            JSONRenderer().render(TimetableEntrySerializer(queryset, many=True).data)
+        )
+
+    def test_entries_keyset_pages(self):
+        """Test entry pages follow (session, start, id) without gaps or repeats"""
+        for day in ('Monday', 'Tuesday'):
+            for time_interval in ('14:00-16:00', '9:00-10:00', '10:30-12:30', 'TBA'):
+                TimetableEntry.objects.create(
+                    cohort=self.cohort, section=self.section, instructor=self.instructor,
+                    course=self.course, session=day, time_interval=time_interval
+                )
+        expected = [
+            entry.id for entry in TimetableEntry.objects.order_by('session', 'start_minute', 'id')
+        ]
+        seen = []
+        url = '/api/v1/timetable/entries/'
+        with mock.patch.object(KeysetPagination, 'page_size', 3):
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('count', response.data)
+                seen.extend(entry['id'] for entry in response.data['results'])
+                last = response.data
+                url = response.data['next']
+            response = self.client.get(last['previous'])
+        self.assertEqual(seen, expected)
+        self.assertEqual([entry['id'] for entry in response.data['results']], expected[3:6])
+        response = self.client.get('/api/v1/timetable/entries/?cursor=bogus')
+        self.assertEqual(response.status_code, 404)
+        cursor = base64.urlsafe_b64encode(json.dumps({'v': ['Monday', 'x', 1], 'r': 0}).encode()).decode()
+        response = self.client.get('/api/v1/timetable/entries/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_instructor_timetable_by_name(self):
+        """Test instructor timetable lookup from JSON"""
+        response = self.client.get('/api/v1/timetable/instructor/?instructor_name=Dieudonne, U.')
+        self.assertEqual(response.status_code, 200)
+        for days in response.data.values():
+            for sessions in days.values():
+                for session in sessions.values():
+                    self.assertEqual(session['Instructor'], 'Dieudonne, U.')
+
+    
+    def test_timetable_etag_and_not_modified(self):
+        """Test cached timetable responses honour If-None-Match"""
+        response = self.client.get('/api/v1/timetable/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertEqual(json.loads(response.content), load_timetable_json())
+        
+        response = self.client.get('/api/v1/timetable/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+    
+    def test_by_section_etag_differs_from_list(self):
+        """Test each timetable resource gets its own validator"""
+        term = next(iter(load_timetable_json()))
+        section = next(iter(load_timetable_json()[term]))
+        response = self.client.get(
+            '/api/v1/timetable/by_section/', {'term': term, 'section': section}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['section'], section)
+        self.assertNotEqual(response['ETag'], self.client.get('/api/v1/timetable/')['ETag'])
+
+    
+    def test_timetable_gzip_variant(self):
+        """Test gzip clients get the precompressed body with its own ETag"""
+        plain = self.client.get('/api/v1/timetable/')
+        response = self.client.get('/api/v1/timetable/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertNotEqual(response['ETag'], plain['ETag'])
+        
+        response = self.client.get(
+            '/api/v1/timetable/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        
+        response = self.client.get('/api/v1/timetable/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    
+    def test_accept_parameters_share_one_rendering(self):
+        """Test Accept parameters other than indent do not add cache entries"""
+        snapshot = timetable_store.get()
+        snapshot.rendered.clear()
+        bodies = {
+            self.client.get('/api/v1/timetable/', HTTP_ACCEPT=f'application/json; x={n}').content
+            for n in range(5)
+        }
+        self.assertEqual(len(bodies), 1)
+        self.assertEqual(len(snapshot.rendered), 1)
+        indented = self.client.get('/api/v1/timetable/', HTTP_ACCEPT='application/json; indent=2')
+        self.assertIn(b'\n  ', indented.content)
+        self.assertEqual(len(snapshot.rendered), 2)
+
+    def test_timetable_stream_matches_full_response(self):
+        """Test streamed timetable is byte-identical to the buffered one"""
+        full = self.client.get('/api/v1/timetable/')
+        response = self.client.get('/api/v1/timetable/?stream=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), full.content)
+        
+        response = self.client.get('/api/v1/timetable/?stream=true', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_timetable_section_pages(self):
+        """Test cursor pages cover every section exactly once"""
+        timetable_data = load_timetable_json()
+        collected = {}
+        cursor = None
+        while True:
+            params = {'page_sections': 4}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get('/api/v1/timetable/', params)
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.content)
+            self.assertLessEqual(sum(len(s) for s in page['results'].values()), 4)
+            for term, sections in page['results'].items():
+                collected.setdefault(term, {}).update(sections)
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(collected, timetable_data)
+        
+        response = self.client.get('/api/v1/timetable/', {'page_sections': 4, 'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+        
+        # Forged offsets past the last section are not rendered or cached
+        snapshot = timetable_store.get()
+        rendered = len(snapshot.rendered)
+        for offset in (len(snapshot.section_keys), 10 ** 9):
+            response = self.client.get('/api/v1/timetable/', {
+                'page_sections': 4, 'cursor': encode_cursor(snapshot, offset)
+            })
+            self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(snapshot.rendered), rendered)
+
+
+class TimetableStoreTests(SimpleTestCase):
+    """Test the process-wide timetable store"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'timetable.json')
+        self._write({'Term_1': {'BAPM_2023_Section_A': {'Monday': {}, 'Tuesday': {
+            'Session 1': {
+                'Course': 'Managerial Economics', 'Instructor': 'Dieudonne, U.',
+                'Classroom': 'Nyanza Classroom', 'Type': 'Lecture', 'Time': '9:00-10:00',
+            },
+        }}}})
+        self.store = TimetableStore(paths=[self.path])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write(self, data, mtime_offset=0):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        # Bump mtime explicitly so coarse filesystem clocks still see a change
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + mtime_offset))
+
+    def test_snapshot_reused_while_file_unchanged(self):
+        """Test the file is parsed once and the snapshot shared"""
+        first = self.store.get()
+        self.assertIn('Term_1', first.data)
+        self.assertIs(self.store.get(), first)
+
+    def test_reload_on_change(self):
+        """Test a modified file produces a new snapshot"""
+        first = self.store.get()
+        self._write({'Term_2': {}}, mtime_offset=10**9)
+        second = self.store.get()
+        self.assertIsNot(second, first)
+        self.assertIn('Term_2', second.data)
+
+    def test_invalid_file_keeps_last_good_snapshot(self):
+        """Test a broken file does not replace the loaded timetable"""
+        first = self.store.get()
+        self._write('{not json', mtime_offset=10**9)
+        self.assertIs(self.store.get(), first)
+
+    def test_missing_file_returns_empty(self):
+        """Test a missing file yields an empty timetable"""
+        store = TimetableStore(paths=[os.path.join(self.tmpdir, 'missing.json')])
+        self.assertEqual(store.get().data, {})
+
+    def test_inverted_indexes(self):
+        """Test sessions are indexed by instructor, classroom, course and day"""
+        snapshot = self.store.get()
+        refs = snapshot.sessions_for_instructor('Dieudonne, U.')
+        self.assertEqual(len(refs), 1)
+        self.assertEqual(refs[0].section, 'BAPM_2023_Section_A')
+        self.assertEqual(refs[0].day, 'Tuesday')
+        self.assertEqual(refs[0].session, 'Session 1')
+        self.assertEqual(snapshot.sessions_for_classroom('Nyanza Classroom'), refs)
+        self.assertEqual(snapshot.sessions_for_course('Managerial Economics'), refs)
+        self.assertEqual(snapshot.sessions_for_day('Tuesday'), refs)
+        self.assertEqual(snapshot.sessions_for_instructor('Nobody'), [])
+
+    def test_structure_is_validated(self):
+        """Test a file with the wrong nesting is rejected"""
+        store = TimetableStore(paths=[self.path])
+        self._write({'Term_1': {'BAPM_2023_Section_A': ['Monday']}})
+        self.assertEqual(store.get().data, {})
+
+    def test_watched_store_reloads_only_from_watcher(self):
+        """Test requests keep the published snapshot until the watcher swaps it"""
+        watcher = TimetableWatcher(self.store, interval=60)
+        self.store.refresh(prepare=prepare_snapshot)
+        self.store.watched = True
+        first = self.store.get()
+        self.assertIn('search', first._derived)
+
+        self._write({'Term_2': {}}, mtime_offset=10**9)
+        self.assertIs(self.store.get(), first)
+        watcher.check()
+        second = self.store.get()
+        self.assertIn('Term_2', second.data)
+        self.assertIn('occupancy', second._derived)
+
+    def test_watcher_follows_setting(self):
+        """Test the watcher starts only when TIMETABLE_WATCH enables it"""
+        with self.settings(TIMETABLE_WATCH=True):
+            self.assertTrue(should_watch())
+            with self.settings(TIMETABLE_WATCH_INTERVAL=0):
+                self.assertFalse(should_watch())
+        with self.settings(TIMETABLE_WATCH=False):
+            self.assertFalse(should_watch())
+
+    def test_clear_reloads_watched_store(self):
+        """Test clear() makes a watched store read the file again"""
+        self.store.watched = True
+        self.assertIn('Term_1', self.store.get().data)
+        self.store.clear()
+        self.assertIn('Term_1', self.store.get().data)
+
+
+class OccupancyIndexTests(SimpleTestCase):
+    """Test the classroom interval index"""
+
+    def setUp(self):
+        def session(classroom, time, course='Course'):
+            return {'Course': course, 'Instructor': 'X', 'Classroom': classroom, 'Type': 'Lecture', 'Time': time}
+
+        self.snapshot = TimetableSnapshot({'Term_1': {
+            'A_Section_A': {'Tuesday': {
+                'Session 1': session('Room 1', '9:00-10:00'),
+                'Session 2': session('Room 1', '10:30-12:30'),
+                'Session 3': session('N/A', '14:00-15:00'),
+            }},
+            'A_Section_B': {'Tuesday': {
+                'Session 1': session('Room 2', '9:30-11:00'),
+                'Session 2': session('Room 1', '11:00-13:00'),
+            }},
+        }})
+        self.index = get_occupancy_index(self.snapshot)
+
+    def test_parse_time_interval(self):
+        """Test time strings are parsed into minute ranges"""
+        self.assertEqual(parse_time_interval('9:00-10:00'), (540, 600))
+        self.assertEqual(parse_time_interval('10:30 - 12:30'), (630, 750))
+        for value in ('', '9:00', '10:00-9:00', '9:60-10:00', None):
+            with self.assertRaises(ValueError):
+                parse_time_interval(value)
+
+    def test_free_rooms(self):
+        """Test free/busy split for a window"""
+        self.assertEqual(self.index.free_rooms(None, 'Tuesday', 600, 630), (['Room 1'], ['Room 2']))
+        self.assertEqual(self.index.free_rooms(None, 'Tuesday', 780, 840), (['Room 1', 'Room 2'], []))
+        self.assertEqual(self.index.free_rooms('Term_1', 'Monday', 540, 600), (['Room 1', 'Room 2'], []))
+        with self.assertRaises(ValueError):
+            self.index.free_rooms(None, 'Tuesdy', 600, 630)
+
+    def test_busy_with_overlapping_bookings(self):
+        """Test a long booking hidden behind shorter ones is still found"""
+        room = self.index.classroom_day(None, 'Tuesday', 'Room 1')
+        self.assertTrue(room.is_busy(720, 730))
+        self.assertEqual([ref.section for ref in room.overlapping(720, 730)], ['A_Section_A', 'A_Section_B'])
+        self.assertFalse(room.is_busy(600, 630))
+
+    def test_booked_minutes(self):
+        """Test utilization counts overlapping bookings once"""
+        room = self.index.classroom_day(None, 'Tuesday', 'Room 1')
+        # 9:00-10:00 plus the union 10:30-13:00
+        self.assertEqual(room.booked_minutes(0, 24 * 60), 60 + 150)
+        self.assertEqual(room.booked_minutes(570, 660), 30 + 30)
+        self.assertEqual(room.booked_minutes(600, 630), 0)
+
+    def test_day_schedule_now_and_next(self):
+        """Test now/next lookups over the sorted per-day arrays"""
+        schedule = self.snapshot.day_schedule(None, 'Tuesday')
+        self.assertEqual(
+            [(ref.section, ref.session) for ref in schedule.current(600)],
+            [('A_Section_B', 'Session 1')]
+        )
+        # 10:30-12:30 is still running while 11:00-13:00 has started
+        self.assertEqual(len(schedule.current(700)), 2)
+        self.assertEqual(schedule.current(15 * 60), [])
+        start, refs = schedule.upcoming(600)
+        self.assertEqual(start, 630)
+        self.assertEqual([ref.session for ref in refs], ['Session 2'])
+        self.assertEqual(schedule.upcoming(14 * 60), (None, []))
+        self.assertIsNone(self.snapshot.day_schedule('Term_1', 'Sunday'))
+
+    def test_now_endpoint(self):
+        """Test the now/next endpoints resolve day and time"""
+        client = APIClient()
+        response = client.get('/api/v1/timetable/now/', {'day': 'Tuesday', 'time': '9:30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['time'], '9:30')
+        response = client.get('/api/v1/timetable/next/', {'at': '2026-01-13T09:30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['day'], 'Tuesday')
+        self.assertIn('start', response.data)
+        response = client.get('/api/v1/timetable/now/', {'at': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_free_rooms_endpoint(self):
+        """Test the free room finder validates its parameters"""
+        client = APIClient()
+        response = client.get('/api/v1/timetable/free_rooms/', {'day': 'Tuesday', 'start': '14:00', 'end': '15:00'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('free', response.data)
+        response = client.get('/api/v1/timetable/free_rooms/', {'day': 'Tuesday', 'start': '15:00', 'end': '14:00'})
+        self.assertEqual(response.status_code, 400)
+        response = client.get('/api/v1/timetable/free_rooms/', {'day': 'Tuesdy', 'start': '14:00', 'end': '15:00'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('day must be one of', response.data['error'])
+
+    def test_occupancy_endpoint_rejects_unknown_day(self):
+        """Test occupancy returns 400 for a day that is not a weekday"""
+        client = APIClient()
+        response = client.get('/api/v1/timetable/occupancy/', {'day': 'Tuesday'})
+        self.assertEqual(response.status_code, 200)
+        response = client.get('/api/v1/timetable/occupancy/', {'day': 'Funday'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('day must be one of', response.data['error'])
+
+    def test_conflicts(self):
+        """Test overlapping bookings of one classroom are reported once"""
+        conflicts = [c for c in find_conflicts(self.snapshot) if c['type'] == 'classroom']
+        self.assertEqual(len(conflicts), 1)
+        conflict = conflicts[0]
+        self.assertEqual((conflict['type'], conflict['resource']), ('classroom', 'Room 1'))
+        self.assertEqual((conflict['start'], conflict['end']), ('11:00', '12:30'))
+        self.assertEqual(
+            [(s['section'], s['session']) for s in conflict['sessions']],
+            [('A_Section_A', 'Session 2'), ('A_Section_B', 'Session 2')]
+        )
+        self.assertIs(get_conflicts(self.snapshot), get_conflicts(self.snapshot))
+
+    def test_combined_sessions_are_not_conflicts(self):
+        """Test one lecture given to several sections is not a double-booking"""
+        lecture = {'Course': 'Calculus', 'Instructor': 'Y', 'Classroom': 'Room 3', 'Type': 'Lecture', 'Time': '9:00-10:00'}
+        snapshot = TimetableSnapshot({'Term_1': {
+            'A_Section_A': {'Monday': {'Session 1': lecture}},
+            'A_Section_B': {'Monday': {'Session 1': dict(lecture)}},
+            'A_Section_C': {'Monday': {'Session 1': dict(lecture, Course='Statistics', Time='9:30-10:30')}},
+        }})
+        conflicts = find_conflicts(snapshot)
+        self.assertEqual(sorted(c['type'] for c in conflicts), ['classroom', 'instructor'])
+        for conflict in conflicts:
+            self.assertEqual(len(conflict['sessions']), 3)
+
+
+class TimetableSearchTests(SimpleTestCase):
+    """Test fuzzy name search"""
+
+    def setUp(self):
+        def session(course, instructor, classroom):
+            return {'Course': course, 'Instructor': instructor, 'Classroom': classroom, 'Type': 'Lecture', 'Time': '9:00-10:00'}
+
+        self.snapshot = TimetableSnapshot({'Term_1': {'A_Section_A': {'Monday': {
+            'Session 1': session('Calculus for Business', 'Dieudonne, U.', 'Nyanza Classroom'),
+            'Session 2': session('Business Finance', 'Jean Claude, S.', 'Gasabo Classroom'),
+            'Session 3': session('Managerial Economics', 'Dr. Sam, B.', 'Nyanza Classroom'),
+        }}}})
+        self.index = get_search_index(self.snapshot)
+
+    def test_normalize(self):
+        """Test case, accents and punctuation are folded"""
+        self.assertEqual(normalize('  Dieudonné, U. '), 'dieudonne u')
+
+    def test_typo_tolerant(self):
+        """Test misspelled names still rank first"""
+        results = self.index.search('dieudone')
+        self.assertEqual(results[0]['name'], 'Dieudonne, U.')
+        self.assertEqual(results[0]['kind'], 'instructor')
+
+    def test_prefix_and_kind_filter(self):
+        """Test word prefixes match and kind restricts results"""
+        self.assertEqual(self.index.search('sam')[0]['name'], 'Dr. Sam, B.')
+        results = self.index.search('nyanza', kind='classroom')
+        self.assertEqual([(r['name'], r['sessions']) for r in results], [('Nyanza Classroom', 2)])
+        self.assertEqual(self.index.search('nyanza', kind='course'), [])
+        self.assertEqual(self.index.search('zzzz'), [])
+
+
+class PartitionedTimetableStoreTests(SimpleTestCase):
+    """Test lazily loaded per-term timetable files"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.terms = ['Term_1_AY_2024/2025_Timetable', 'Term_1_AY_2025/2026_Timetable']
+        for term in self.terms:
+            with open(os.path.join(self.tmpdir, term_filename(term)), 'w', encoding='utf-8') as f:
+                json.dump({term: {'BAPM_2023_Section_A': {'Monday': {}}}}, f)
+        # Room for a single term only
+        self.store = PartitionedTimetableStore(self.tmpdir, max_bytes=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_terms_listed_from_file_names(self):
+        """Test term names are decoded from file names"""
+        self.assertEqual(self.store.terms(), self.terms)
+
+    def test_get_term_loads_only_that_term(self):
+        """Test a term lookup parses one file and evicts older terms"""
+        old, current = self.terms
+        self.assertEqual(list(self.store.get_term(old).data), [old])
+        self.assertEqual(list(self.store.get_term(current).data), [current])
+        self.assertEqual(list(self.store._partitions), [current])
+        self.assertEqual(self.store.get_term('Unknown').data, {})
+
+    def test_get_combines_every_term(self):
+        """Test the whole-timetable snapshot is reused until a term changes"""
+        combined = self.store.get()
+        self.assertEqual(list(combined.data), self.terms)
+        self.assertIsNotNone(combined.content_hash)
+        self.assertIs(self.store.get(), combined)
+
+    def test_combined_terms_not_reparsed_over_cap(self):
+        """Test get() keeps the terms it combines even when they exceed max_bytes"""
+        load = TimetableStore._load
+        with mock.patch.object(TimetableStore, '_load', autospec=True, side_effect=load) as parsed:
+            combined = self.store.get()
+            self.assertIs(self.store.get(), combined)
+            self.assertEqual(self.store.get_term(self.terms[0]).data, {
+                self.terms[0]: combined.data[self.terms[0]]
+            })
+        self.assertEqual(parsed.call_count, len(self.terms))
+        # The term lookup needed the room: the combined snapshot gave way
+        self.assertEqual(list(self.store._partitions), [self.terms[0]])
+        self.assertIsNot(self.store.get(), combined)
+
+    def test_term_lookups_after_get_respect_cap(self):
+        """Test term lookups after get() bring resident JSON back under max_bytes"""
+        term = 'Term_2_AY_2025/2026_Timetable'
+        with open(os.path.join(self.tmpdir, term_filename(term)), 'w', encoding='utf-8') as f:
+            json.dump({term: {'BAPM_2023_Section_A': {'Monday': {}}}}, f)
+        max_bytes = max(entry.stat().st_size for entry in os.scandir(self.tmpdir))
+        store = PartitionedTimetableStore(self.tmpdir, max_bytes=max_bytes)
+        self.assertEqual(len(store.get().data), 3)
+        for name in self.terms + [term]:
+            self.assertEqual(list(store.get_term(name).data), [name])
+            resident = sum(partition.loaded_bytes for partition in store._partitions.values())
+            self.assertLessEqual(resident, max_bytes)
+
+
+class LoadTimetableCommandTests(TestCase):
+    """Test the bulk load_timetable management command"""
+
+    def setUp(self):
+        self.data = {
+            'Term_1': {
+                'BAPM_2023_Section_A': {
+                    'Monday': {
+                        'Session 1': {'Course': 'Data Science', 'Instructor': 'Dr. Smith',
+                                      'Time': '08:00-10:00', 'Classroom': 'R1', 'Type': 'Lecture'},
+                        'Session 2': {'Course': 'Data Science', 'Instructor': 'Dr. Smith',
+                                      'Time': '10:00-12:00', 'Classroom': 'R1', 'Type': 'Lecture'},
+                    },
+                },
+                'BAPM_2023_Section_B': {
+                    'Tuesday': {
+                        'Session 1': {'Course': 'Statistics', 'Instructor': 'Dr. Jones',
+                                      'Time': '08:00-10:00', 'Classroom': 'R2', 'Type': 'Lab'},
+                    },
+                },
+                'Invalid': {},
+            },
+        }
+        fd, self.json_file = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+
+    def tearDown(self):
+        os.remove(self.json_file)
+
+    def _load(self, **options):
+        out = io.StringIO()
+        call_command('load_timetable', json_file=self.json_file, stdout=out, **options)
+        return out.getvalue()
+
+    def test_load_creates_related_rows_in_bulk(self):
+        """Test a load creates every row and reports per-entry lines"""
+        output = self._load()
+        self.assertEqual(TimetableEntry.objects.count(), 3)
+        self.assertEqual(Section.objects.filter(cohort__name='BAPM_2023').count(), 2)
+        self.assertEqual(Course.objects.get(code='DS').name, 'Data Science')
+        self.assertIn('[+] Created: BAPM_2023 A - Monday 08:00-10:00 - Data Science', output)
+        self.assertIn('Skipping invalid section name: Invalid', output)
+
+    def _save(self):
+        with open(self.json_file, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+
+    def test_reload_writes_only_changed_sessions(self):
+        """Test a second load updates changed sessions and leaves the rest untouched"""
+        self._load()
+        unchanged = TimetableEntry.objects.get(session='Monday', time_interval='08:00-10:00')
+        self.data['Term_1']['BAPM_2023_Section_B']['Tuesday']['Session 1']['Classroom'] = 'R9'
+        self._save()
+        output = self._load(summary=True)
+        self.assertNotIn('[+] Created', output)
+        self.assertIn('Successfully loaded 0 timetable entries (1 updated, 0 deleted, 2 unchanged)', output)
+        self.assertEqual(TimetableEntry.objects.count(), 3)
+        self.assertEqual(TimetableEntry.objects.get(section__name='B').classroom, 'R9')
+        self.assertEqual(TimetableEntry.objects.get(pk=unchanged.pk).updated_at, unchanged.updated_at)
+
+    def test_sync_deletes_removed_sessions(self):
+        """Test --sync deletes sessions of the loaded terms that left the file"""
+        self._load()
+        # Untracked entry from before hashes were stored is adopted, not duplicated
+        TimetableEntry.objects.filter(section__name='B').update(term='', session_key='', content_hash='')
+        del self.data['Term_1']['BAPM_2023_Section_A']['Monday']['Session 2']
+        self._save()
+        output = self._load(summary=True, sync=True)
+        self.assertIn('(1 updated, 1 deleted, 1 unchanged)', output)
+        self.assertEqual(
+            sorted(TimetableEntry.objects.values_list('term', 'session_key')),
+            [('Term_1', 'Session 1'), ('Term_1', 'Session 1')]
+        )
+
+    def test_terms_with_identical_sessions_kept_apart(self):
+        """Test a term repeating another term's session gets its own row"""
+        self._load()
+        self.data = {'Term_2': {'BAPM_2023_Section_A': self.data['Term_1']['BAPM_2023_Section_A']}}
+        self._save()
+        output = self._load(summary=True, sync=True)
+        self.assertIn('Successfully loaded 2 timetable entries (0 updated, 0 deleted, 0 unchanged)', output)
+        self.assertEqual(
+            sorted(TimetableEntry.objects.filter(section__name='A').values_list('term', 'session_key')),
+            [('Term_1', 'Session 1'), ('Term_1', 'Session 2'), ('Term_2', 'Session 1'), ('Term_2', 'Session 2')]
+        )
+
+    def test_one_load_keeps_terms_with_identical_sessions(self):
+        """Test a single write of two terms sharing a session creates both rows"""
+        self.data['Term_2'] = {'BAPM_2023_Section_A': self.data['Term_1']['BAPM_2023_Section_A']}
+        self._save()
+        output = self._load(summary=True)
+        self.assertIn('Successfully loaded 5 timetable entries', output)
+        self.assertEqual(
+            sorted(TimetableEntry.objects.filter(section__name='A').values_list('term', 'session_key')),
+            [('Term_1', 'Session 1'), ('Term_1', 'Session 2'), ('Term_2', 'Session 1'), ('Term_2', 'Session 2')]
+        )
+
+    def test_failed_write_rolls_back(self):
+        """Test nothing is written when the bulk write fails"""
+        with mock.patch.object(TimetableEntry.objects, 'bulk_create', side_effect=RuntimeError('boom')):
+            with self.assertRaises(CommandError):
+                self._load()
+        self.assertFalse(Cohort.objects.exists())
+
+    def test_load_directory_in_worker_processes(self):
+        """Test every file of a directory is parsed in parallel and written together"""
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        for name, section in (('bapm.json', 'BAPM_2023_Section_A'), ('bcs.json', 'BCS_2024_Section_A')):
+            with open(os.path.join(tmpdir, name), 'w', encoding='utf-8') as f:
+                json.dump({'Term_1': {section: self.data['Term_1']['BAPM_2023_Section_A']}}, f)
+        out = io.StringIO()
+        call_command('load_timetable', json_file=tmpdir, workers=2, summary=True, stdout=out)
+        self.assertIn('Files: 2, terms: 1, sessions read: 4', out.getvalue())
+        self.assertEqual(
+            sorted(set(TimetableEntry.objects.values_list('cohort__name', flat=True))),
+            ['BAPM_2023', 'BCS_2024']
+        )
+
+    def test_load_refreshes_read_models(self):
+        """Test bulk writes rebuild the documents of the sections they touch"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._load(summary=True)
+        section = Section.objects.get(cohort__name='BAPM_2023', name='A')
+        document = SectionTimetable.objects.get(section=section)
+        self.assertEqual([entry['time_interval'] for entry in document.entries], ['08:00-10:00', '10:00-12:00'])
@@ -3,46 +3,72 @@ Timetable app views and viewsets
 """
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
-from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 import logging
-import json
-import os
 
+from core.pagination import KeysetPagination
+from core.serializers import SparseFieldsetMixin, ValuesListMixin, optimize_queryset
 from .models import Cohort, Section, Instructor, Course, TimetableEntry
 from .serializers import (
     CohortSerializer, SectionSerializer, InstructorSerializer,
     CourseSerializer, TimetableEntrySerializer,
     TimetableStudentViewSerializer, TimetableInstructorViewSerializer
 )
+from .conflicts import CONFLICT_KINDS, get_conflicts
+from .filters import TimetableEntryFilter
+from .intervals import format_minutes, parse_time
+from .occupancy import get_occupancy_index
+from .read_models import get_instructor_document, get_section_document
+from .responses import cached_timetable_response
+from .search import SEARCH_KINDS, get_search_index
+from .store import describe_session, timetable_store
+from .streaming import (
+    build_section_page, decode_cursor, encode_cursor, iter_timetable_json
+)
 
 logger = logging.getLogger(__name__)
 
+DAY_NAMES = [day for day, _ in TimetableEntry.SESSION_CHOICES]
+
+# Upper bound for ?page_sections= on the full timetable
+MAX_PAGE_SECTIONS = 50
+
+# Default and upper bound for ?limit= on timetable search
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
 
 def load_timetable_json():
-    """Load timetable data from JSON file"""
-    try:
-        # Load from Backend/timetable/timetable.json
-        json_path = os.path.join(settings.BASE_DIR, 'timetable', 'timetable.json')
-        if os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        # Fallback to Backend directory root
-        json_path = os.path.join(settings.BASE_DIR, 'timetable.json')
-        if os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        logger.warning("Timetable JSON file not found")
-        return {}
-    except Exception as e:
-        logger.error(f"Error loading timetable JSON: {str(e)}")
-        return {}
+    """
+    Load timetable data from JSON file
+    Served from the process-wide store; the file is only re-parsed when it changes
+    """
+    return timetable_store.get().data
+
+
+def _has_entry_filters(request):
+    """True when a request narrows or reorders the legacy entry lists"""
+    return any(
+        name in request.query_params
+        for name in list(TimetableEntryFilter.base_filters) + ['ordering']
+    )
+
 
+def _snapshot_for_term(term=None):
+    """Snapshot holding `term`, or every term when it is not given"""
+    return timetable_store.get_term(term) if term else timetable_store.get()
 
-class CohortViewSet(viewsets.ReadOnlyModelViewSet):
+
+class CohortViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Cohort ViewSet
     GET /api/v1/cohorts/ - List all cohorts
@@ -56,7 +82,7 @@ class CohortViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['name']
 
 
-class SectionViewSet(viewsets.ReadOnlyModelViewSet):
+class SectionViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Section ViewSet
     GET /api/v1/sections/ - List all sections
@@ -71,7 +97,7 @@ class SectionViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['cohort', 'name']
 
 
-class InstructorViewSet(viewsets.ReadOnlyModelViewSet):
+class InstructorViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Instructor ViewSet
     GET /api/v1/instructors/ - List all instructors
@@ -86,7 +112,7 @@ class InstructorViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['name']
 
 
-class CourseViewSet(viewsets.ReadOnlyModelViewSet):
+class CourseViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Course ViewSet
     GET /api/v1/courses/ - List all courses
@@ -101,33 +127,48 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['code']
 
 
-class TimetableEntryViewSet(viewsets.ReadOnlyModelViewSet):
+class TimetableEntryViewSet(SparseFieldsetMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     """
     TimetableEntry ViewSet with custom actions for student and instructor views
     
     GET /api/v1/timetable/ - Get all timetable data from JSON
     GET /api/v1/timetable/by-term/ - Get timetable by term
     GET /api/v1/timetable/by-section/ - Get timetable by section (requires section parameter)
+    
+    Database-backed responses accept ?start_after=9:00 and ?end_before=13:00
+    and are ordered by day and start time. Entries and single entries also
+    take ?fields= and ?expand= (SparseFieldsetMixin).
     """
-    queryset = TimetableEntry.objects.select_related(
-        'cohort', 'section', 'instructor', 'course'
-    )
+    queryset = TimetableEntry.objects.all()
     serializer_class = TimetableEntrySerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['cohort', 'section', 'instructor', 'course', 'session', 'type']
-    ordering_fields = ['session', 'time_interval', 'created_at']
-    ordering = ['session', 'time_interval']
+    filterset_class = TimetableEntryFilter
+    pagination_class = KeysetPagination
+    ordering_fields = ['session', 'start_minute', 'time_interval', 'created_at']
+    ordering = ['session', 'start_minute']
+    # list serves the JSON timetable, so fieldsets apply to the ORM actions
+    fieldset_actions = ('entries', 'retrieve')
     
     def list(self, request, *args, **kwargs):
         """
         Override list to return timetable from JSON
         GET /api/v1/timetable/
+        GET /api/v1/timetable/?stream=true - Stream the timetable section by section
+        GET /api/v1/timetable/?page_sections=5&cursor={cursor} - Fetch it in bounded pages
         """
         try:
-            timetable_data = load_timetable_json()
-            if timetable_data:
-                return Response(timetable_data)
+            snapshot = timetable_store.get()
+            if snapshot.data:
+                if 'page_sections' in request.query_params:
+                    return self._section_page(request, snapshot)
+                if request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+                    return self._stream(request, snapshot)
+                return cached_timetable_response(
+                    request, snapshot, ('list',), lambda: snapshot.data
+                )
             return Response({'error': 'No timetable data available'}, status=400)
+        except NotFound:
+            raise
         except Exception as e:
             logger.error(f"Error retrieving timetable: {str(e)}")
             return Response(
@@ -135,6 +176,143 @@ class TimetableEntryViewSet(viewsets.ReadOnlyModelViewSet):
                 status=HTTP_400_BAD_REQUEST
             )
     
+    def _stream(self, request, snapshot):
+        """The full timetable streamed section by section, or 304 if the client has it"""
+        etag = f'"{snapshot.content_hash[:40]}"'
+        last_modified = int(snapshot.last_modified)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is None:
+            response = StreamingHttpResponse(
+                iter_timetable_json(snapshot.data),
+                content_type='application/json'
+            )
+        else:
+            response = not_modified
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+    
+    def _section_page(self, request, snapshot):
+        """
+        One page of the full timetable, `page_sections` sections at a time
+        Pages are cached and validated like the other timetable responses.
+        """
+        try:
+            page_size = int(request.query_params.get('page_sections'))
+            if page_size < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'page_sections must be a positive integer'},
+                status=HTTP_400_BAD_REQUEST
+            )
+        page_size = min(page_size, MAX_PAGE_SECTIONS)
+        
+        cursor = request.query_params.get('cursor')
+        try:
+            offset = decode_cursor(snapshot, cursor, len(snapshot.section_keys)) if cursor else 0
+        except ValueError as e:
+            return Response({'error': str(e)}, status=HTTP_400_BAD_REQUEST)
+        
+        def build_page():
+            results, next_offset = build_section_page(snapshot, offset, page_size)
+            return {
+                'count': len(snapshot.section_keys),
+                'next_cursor': encode_cursor(snapshot, next_offset) if next_offset is not None else None,
+                'results': results,
+            }
+        
+        return cached_timetable_response(
+            request, snapshot, ('page', offset, page_size), build_page
+        )
+    
+    def _resolve_moment(self, request):
+        """
+        (day, minute) for now/next lookups
+        Uses ?at= (ISO datetime) or ?day= and ?time=, defaulting to the current time.
+        Raises ValueError on malformed input.
+        """
+        at = request.query_params.get('at')
+        day = request.query_params.get('day')
+        time = request.query_params.get('time')
+        
+        if at:
+            moment = parse_datetime(at)
+            if moment is None:
+                raise ValueError('at must be an ISO datetime like 2026-01-13T10:00')
+        else:
+            moment = timezone.now()
+        if timezone.is_aware(moment):
+            moment = timezone.localtime(moment)
+        
+        if day and day not in DAY_NAMES:
+            raise ValueError(f'day must be one of: {", ".join(DAY_NAMES)}')
+        day = day or DAY_NAMES[moment.weekday()]
+        minute = parse_time(time) if time else moment.hour * 60 + moment.minute
+        return day, minute
+    
+    def _moment_sessions(self, request, upcoming=False):
+        """Shared body of the now/next actions"""
+        term = request.query_params.get('term')
+        try:
+            day, minute = self._resolve_moment(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=HTTP_400_BAD_REQUEST)
+        
+        try:
+            snapshot = _snapshot_for_term(term)
+            if term and term not in snapshot.data:
+                return Response(
+                    {'error': f'Term "{term}" not found'},
+                    status=HTTP_400_BAD_REQUEST
+                )
+            schedule = snapshot.day_schedule(term, day)
+            data = {'term': term, 'day': day, 'time': format_minutes(minute)}
+            if upcoming:
+                start, refs = schedule.upcoming(minute) if schedule else (None, [])
+                data['start'] = format_minutes(start) if start is not None else None
+            else:
+                refs = schedule.current(minute) if schedule else []
+            data['sessions'] = [describe_session(ref) for ref in refs]
+            return Response(data)
+        except Exception as e:
+            logger.error(f"Error looking up current sessions: {str(e)}")
+            return Response(
+                {'error': 'Failed to retrieve timetable'},
+                status=HTTP_400_BAD_REQUEST
+            )
+    
+    @action(detail=False, methods=['get'])
+    def now(self, request):
+        """
+        Sessions running at a moment, across every section and room
+        Optional: at (ISO datetime) or day and time, term
+        
+        Example: GET /api/v1/timetable/now/?at=2026-01-13T10:45
+        """
+        return self._moment_sessions(request)
+    
+    @action(detail=False, methods=['get'], url_path='next')
+    def next_sessions(self, request):
+        """
+        Sessions starting next on the same day
+        Optional: at (ISO datetime) or day and time, term
+        
+        Example: GET /api/v1/timetable/next/?day=Tuesday&time=12:45
+        """
+        return self._moment_sessions(request, upcoming=True)
+    
+    @action(detail=False, methods=['get'])
+    def entries(self, request):
+        """
+        Timetable entries from the database, keyset-paginated on (session, start, id)
+        Supports the entry filters, ?ordering= and the next/previous cursor links
+        
+        Example: GET /api/v1/timetable/entries/?instructor=3&start_after=10:00
+        """
+        return self.values_list_response(self.filter_queryset(self.get_queryset()))
+    
     @action(detail=False, methods=['get'])
     def by_term(self, request):
         """
@@ -150,9 +328,13 @@ class TimetableEntryViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         try:
-            timetable_data = load_timetable_json()
+            snapshot = timetable_store.get_term(term)
+            timetable_data = snapshot.data
             if term in timetable_data:
-                return Response({term: timetable_data[term]})
+                return cached_timetable_response(
+                    request, snapshot, ('by_term', term),
+                    lambda: {term: timetable_data[term]}
+                )
             return Response(
                 {'error': f'Term "{term}" not found'},
                 status=HTTP_400_BAD_REQUEST
@@ -180,13 +362,17 @@ class TimetableEntryViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         try:
-            timetable_data = load_timetable_json()
+            snapshot = timetable_store.get_term(term)
+            timetable_data = snapshot.data
             if term in timetable_data and section in timetable_data[term]:
-                return Response({
-                    'term': term,
-                    'section': section,
-                    'data': timetable_data[term][section]
-                })
+                return cached_timetable_response(
+                    request, snapshot, ('by_section', term, section),
+                    lambda: {
+                        'term': term,
+                        'section': section,
+                        'data': timetable_data[term][section]
+                    }
+                )
             return Response(
                 {'error': f'Term "{term}" or section "{section}" not found'},
                 status=HTTP_400_BAD_REQUEST
@@ -221,22 +407,33 @@ class TimetableEntryViewSet(viewsets.ReadOnlyModelViewSet):
         try:
             # If using new parameters
             if term and section:
-                timetable_data = load_timetable_json()
+                snapshot = timetable_store.get_term(term)
+                timetable_data = snapshot.data
                 if term in timetable_data and section in timetable_data[term]:
-                    return Response({
-                        'term': term,
-                        'section': section,
-                        'timetable': timetable_data[term][section]
-                    })
+                    return cached_timetable_response(
+                        request, snapshot, ('student', term, section),
+                        lambda: {
+                            'term': term,
+                            'section': section,
+                            'timetable': timetable_data[term][section]
+                        }
+                    )
                 return Response(
                     {'error': f'Term "{term}" or section "{section}" not found'},
                     status=HTTP_400_BAD_REQUEST
                 )
-            # Legacy support
+            # Legacy support, served from the precomputed read model unless filtered
+            elif not _has_entry_filters(request):
+                return Response(get_section_document(cohort_id, section_id))
             else:
-                queryset = self.queryset.filter(cohort_id=cohort_id, section_id=section_id)
+                queryset = self.filter_queryset(optimize_queryset(
+                    TimetableEntry.objects.filter(cohort_id=cohort_id, section_id=section_id),
+                    TimetableStudentViewSerializer
+                ))
                 serializer = TimetableStudentViewSerializer(queryset, many=True)
                 return Response(serializer.data)
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error in student timetable view: {str(e)}")
             return Response(
@@ -264,21 +461,14 @@ class TimetableEntryViewSet(viewsets.ReadOnlyModelViewSet):
         try:
             # If using instructor_name, search in JSON
             if instructor_name:
-                timetable_data = load_timetable_json()
+                snapshot = timetable_store.get()
                 instructor_schedule = {}
                 
-                # Search through all terms and sections
-                for term, sections in timetable_data.items():
-                    for section, days in sections.items():
-                        for day, sessions in days.items():
-                            for session_key, session_data in sessions.items():
-                                if session_data.get('Instructor') == instructor_name:
-                                    key = f"{term} - {section}"
-                                    if key not in instructor_schedule:
-                                        instructor_schedule[key] = {}
-                                    if day not in instructor_schedule[key]:
-                                        instructor_schedule[key][day] = {}
-                                    instructor_schedule[key][day][session_key] = session_data
+                # Inverted index lookup instead of scanning every session
+                for ref in snapshot.sessions_for_instructor(instructor_name):
+                    key = f"{ref.term} - {ref.section}"
+                    day_sessions = instructor_schedule.setdefault(key, {}).setdefault(ref.day, {})
+                    day_sessions[ref.session] = ref.data
                 
                 if instructor_schedule:
                     return Response(instructor_schedule)
@@ -286,14 +476,235 @@ class TimetableEntryViewSet(viewsets.ReadOnlyModelViewSet):
                     {'error': f'No schedule found for instructor "{instructor_name}"'},
                     status=HTTP_400_BAD_REQUEST
                 )
-            # Legacy support for instructor_id
+            # Legacy support for instructor_id, from the read model unless filtered
+            elif not _has_entry_filters(request):
+                return Response(get_instructor_document(instructor_id))
             else:
-                queryset = self.queryset.filter(instructor_id=instructor_id)
+                queryset = self.filter_queryset(optimize_queryset(
+                    TimetableEntry.objects.filter(instructor_id=instructor_id),
+                    TimetableInstructorViewSerializer
+                ))
                 serializer = TimetableInstructorViewSerializer(queryset, many=True)
                 return Response(serializer.data)
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error in instructor timetable view: {str(e)}")
             return Response(
                 {'error': 'Failed to retrieve assignments'},
                 status=HTTP_400_BAD_REQUEST
             )
+    
+    @action(detail=False, methods=['get'])
+    def free_rooms(self, request):
+        """
+        Classrooms with no booking overlapping a time window
+        Required: day, start, end (optional: term, defaults to all terms)
+        
+        Example: GET /api/v1/timetable/free_rooms/?day=Tuesday&start=14:00&end=15:00
+        """
+        day = request.query_params.get('day')
+        start = request.query_params.get('start')
+        end = request.query_params.get('end')
+        term = request.query_params.get('term')
+        
+        if not day or not start or not end:
+            return Response(
+                {'error': 'day, start and end parameters are required'},
+                status=HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            start_minute, end_minute = parse_time(start), parse_time(end)
+            if end_minute <= start_minute:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'error': 'start and end must be times like 14:00, with end after start'},
+                status=HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            snapshot = _snapshot_for_term(term)
+            if term and term not in snapshot.data:
+                return Response(
+                    {'error': f'Term "{term}" not found'},
+                    status=HTTP_400_BAD_REQUEST
+                )
+            try:
+                free, busy = get_occupancy_index(snapshot).free_rooms(term, day, start_minute, end_minute)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=HTTP_400_BAD_REQUEST)
+            return Response({
+                'term': term,
+                'day': day,
+                'start': format_minutes(start_minute),
+                'end': format_minutes(end_minute),
+                'free': free,
+                'busy': busy,
+            })
+        except Exception as e:
+            logger.error(f"Error finding free rooms: {str(e)}")
+            return Response(
+                {'error': 'Failed to find free rooms'},
+                status=HTTP_400_BAD_REQUEST
+            )
+    
+    @action(detail=False, methods=['get'])
+    def occupancy(self, request):
+        """
+        Classroom bookings and utilization per day
+        Optional: classroom, day, term, open and close (utilization window,
+        defaults to the span of the timetable)
+        
+        Example: GET /api/v1/timetable/occupancy/?classroom=Nyanza Classroom&day=Tuesday
+        """
+        classroom = request.query_params.get('classroom')
+        day = request.query_params.get('day')
+        term = request.query_params.get('term')
+        
+        try:
+            snapshot = _snapshot_for_term(term)
+            if term and term not in snapshot.data:
+                return Response(
+                    {'error': f'Term "{term}" not found'},
+                    status=HTTP_400_BAD_REQUEST
+                )
+            index = get_occupancy_index(snapshot)
+            if index.window is None:
+                return Response(
+                    {'error': 'No timetable data available'},
+                    status=HTTP_400_BAD_REQUEST
+                )
+            
+            open_param = request.query_params.get('open')
+            close_param = request.query_params.get('close')
+            try:
+                open_minute = parse_time(open_param) if open_param else index.window[0]
+                close_minute = parse_time(close_param) if close_param else index.window[1]
+                if close_minute <= open_minute:
+                    raise ValueError
+            except ValueError:
+                return Response(
+                    {'error': 'open and close must be times like 8:00, with close after open'},
+                    status=HTTP_400_BAD_REQUEST
+                )
+            
+            if day:
+                try:
+                    index.check_day(day)
+                except ValueError as e:
+                    return Response({'error': str(e)}, status=HTTP_400_BAD_REQUEST)
+            
+            classrooms = [classroom] if classroom else index.classrooms.get(term, [])
+            days = [day] if day else index.day_names
+            window = close_minute - open_minute
+            result = {}
+            for name in classrooms:
+                result[name] = {}
+                for day_name in days:
+                    bookings = index.classroom_day(term, day_name, name)
+                    booked = bookings.booked_minutes(open_minute, close_minute) if bookings else 0
+                    result[name][day_name] = {
+                        'booked_minutes': booked,
+                        'utilization': round(booked / window, 4),
+                        'bookings': [
+                            describe_session(ref)
+                            for ref in (bookings.overlapping(open_minute, close_minute) if bookings else [])
+                        ],
+                    }
+            return Response({
+                'term': term,
+                'open': format_minutes(open_minute),
+                'close': format_minutes(close_minute),
+                'classrooms': result,
+            })
+        except Exception as e:
+            logger.error(f"Error computing classroom occupancy: {str(e)}")
+            return Response(
+                {'error': 'Failed to compute occupancy'},
+                status=HTTP_400_BAD_REQUEST
+            )
+    
+    @action(detail=False, methods=['get'])
+    def conflicts(self, request):
+        """
+        Instructor and classroom double-bookings in the timetable
+        Optional: type (instructor or classroom)
+        
+        Example: GET /api/v1/timetable/conflicts/?type=classroom
+        """
+        kind = request.query_params.get('type')
+        kinds = [name for name, _, _ in CONFLICT_KINDS]
+        if kind and kind not in kinds:
+            return Response(
+                {'error': f'type must be one of: {", ".join(kinds)}'},
+                status=HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            snapshot = timetable_store.get()
+            if not snapshot.data:
+                return Response(
+                    {'error': 'No timetable data available'},
+                    status=HTTP_400_BAD_REQUEST
+                )
+            
+            def build_data():
+                conflicts = [
+                    c for c in get_conflicts(snapshot)
+                    if not kind or c['type'] == kind
+                ]
+                return {'count': len(conflicts), 'conflicts': conflicts}
+            
+            return cached_timetable_response(request, snapshot, ('conflicts', kind), build_data)
+        except Exception as e:
+            logger.error(f"Error checking timetable conflicts: {str(e)}")
+            return Response(
+                {'error': 'Failed to check timetable conflicts'},
+                status=HTTP_400_BAD_REQUEST
+            )
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Fuzzy, case and accent-insensitive search over instructor, course
+        and classroom names in the timetable
+        Required: q (optional: kind, limit)
+        
+        Example: GET /api/v1/timetable/search/?q=dieudone&kind=instructor
+        """
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('kind')
+        kinds = [name for name, _, _ in SEARCH_KINDS]
+        
+        if not query:
+            return Response(
+                {'error': 'q parameter is required'},
+                status=HTTP_400_BAD_REQUEST
+            )
+        if kind and kind not in kinds:
+            return Response(
+                {'error': f'kind must be one of: {", ".join(kinds)}'},
+                status=HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(int(request.query_params.get('limit', SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'error': 'limit must be a positive integer'},
+                status=HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            snapshot = timetable_store.get()
+            results = get_search_index(snapshot).search(query, kind=kind, limit=limit)
+            return Response({'query': query, 'results': results})
+        except Exception as e:
+            logger.error(f"Error searching timetable: {str(e)}")
+            return Response(
+                {'error': 'Failed to search timetable'},
+                status=HTTP_400_BAD_REQUEST
+            )
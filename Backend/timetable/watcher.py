@@ -0,0 +1,96 @@
+"""
+Background hot reload of timetable data
+
+A daemon thread polls the timetable file(s) by stat, so it works on every
+platform without inotify. When a file changes the new snapshot is parsed,
+validated and given all its derived indexes on the watcher thread, then
+published in one reference swap: in-flight requests finish on the snapshot
+they already hold and no request ever waits for parsing.
+"""
+import logging
+import os
+import threading
+
+from django.conf import settings
+
+from .store import timetable_store
+
+logger = logging.getLogger(__name__)
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def prepare_snapshot(snapshot):
+    """Build every derived structure a request might need for this snapshot"""
+    from .conflicts import get_conflicts
+    from .occupancy import get_occupancy_index
+    from .search import get_search_index
+
+    get_occupancy_index(snapshot)
+    get_conflicts(snapshot)
+    get_search_index(snapshot)
+
+
+class TimetableWatcher(threading.Thread):
+    """Polls a timetable store every `interval` seconds and publishes changes"""
+    def __init__(self, store, interval):
+        super().__init__(name='timetable-watcher', daemon=True)
+        self.store = store
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def check(self):
+        """Reload the store if its files changed"""
+        try:
+            self.store.refresh(prepare=prepare_snapshot)
+        except Exception as e:
+            logger.error(f"Error refreshing timetable: {str(e)}")
+
+    def run(self):
+        logger.info(f"Watching timetable data every {self.interval}s")
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def should_watch():
+    """
+    True when settings.TIMETABLE_WATCH enables hot reload for this process
+    A TIMETABLE_WATCH_INTERVAL of 0 also turns it off.
+    """
+    return settings.TIMETABLE_WATCH and settings.TIMETABLE_WATCH_INTERVAL > 0
+
+
+def start_watcher(store=None):
+    """
+    Load the timetable and start the watcher thread for this process
+
+    The first load happens synchronously so the first request already has
+    a prepared snapshot. A fork handler restarts the thread in child
+    processes (e.g. gunicorn --preload), since threads do not survive fork.
+    """
+    global _watcher
+    store = store or timetable_store
+    with _watcher_lock:
+        if _watcher is not None and _watcher.is_alive():
+            return _watcher
+        store.refresh(prepare=prepare_snapshot)
+        store.watched = True
+        _watcher = TimetableWatcher(store, settings.TIMETABLE_WATCH_INTERVAL)
+        _watcher.start()
+        return _watcher
+
+
+def _restart_after_fork():
+    global _watcher, _watcher_lock
+    _watcher_lock = threading.Lock()
+    if _watcher is not None:
+        store, _watcher = _watcher.store, None
+        start_watcher(store)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)